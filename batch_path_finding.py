@@ -0,0 +1,256 @@
+"""Batch freight path finding.
+
+Reads one JSON path request per line from a file or stdin and writes one JSON
+result per line as soon as it is ready:
+
+    python batch_path_finding.py requests.jsonl -o results.jsonl --workers 8 --checkpoint run.ckpt
+
+A request looks like
+
+    {"request_id": "r1", "start_time": "2024-05-01T08:00:00", "direction": "down"}
+
+with an optional "train" object holding TrainService fields (a dummy freight
+train in "direction" is used otherwise) and optional "deadline" (seconds) and
+"max_attempts". Results carry the chosen path, the alternatives and the
+search statistics. With --checkpoint, finished request ids are recorded and
+skipped when the run is restarted. The checkpoint also records the timetable
+settings (the date defaults to 06:00 on the day of the first run), so a resumed
+run plans against the same timetable. On resume, request ids already present
+in the output file are skipped too, so a crash between writing a result and
+its checkpoint line does not produce a duplicate record.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict
+from datetime import datetime
+from typing import IO, Iterator, Optional, Set, Tuple
+from src.models.core.infrastructure import Infrastructure
+from src.models.core.train import TrainService, TrainPath, Direction
+from src.models.core.timetable import TimetableSnapshot
+from src.data.processors.data_preprocessor import TimetableGenerator
+from src.algorithms.path_finder import PathFinder
+
+_worker_state = {}
+
+
+def _init_worker(timetable_date: Optional[str], num_trains: int, seed: int):
+    """Build the infrastructure, timetable and path finder once per worker process"""
+    random.seed(seed)
+    base_time = datetime.fromisoformat(timetable_date) if timetable_date else None
+    infrastructure = Infrastructure.create_dummy_infrastructure()
+    timetable = TimetableSnapshot.from_paths(
+        TimetableGenerator().generate_dummy_timetable(num_trains, base_time=base_time)
+    )
+    _worker_state["timetable"] = timetable
+    _worker_state["path_finder"] = PathFinder(infrastructure, None, None, verbose=False)
+
+
+def _path_to_dict(path: TrainPath) -> dict:
+    return {
+        "train_id": path.train.id,
+        "journey_time": path.calculate_journey_time(),
+        "schedule": [
+            {"section": section_id, "time": time.isoformat(), "dwell": dwell}
+            for section_id, time, dwell in path.schedule
+        ],
+        "speeds": list(path.speeds),
+        "platforms": list(path.platforms),
+    }
+
+
+def _parse_train(request: dict) -> TrainService:
+    if "train" in request:
+        fields = dict(request["train"])
+        fields["direction"] = Direction(fields["direction"])
+        return TrainService(**fields)
+    return TrainService.create_dummy_freight_train(Direction(request.get("direction", "down")))
+
+
+def _solve(job: Tuple[str, str, int]) -> dict:
+    """Worker: run one request line and return its result record"""
+    request_id, line, num_alternatives = job
+    try:
+        request = json.loads(line)
+        path_finder = _worker_state["path_finder"]
+        best_path, alternatives = path_finder.find_best_path(
+            _parse_train(request),
+            datetime.fromisoformat(request["start_time"]),
+            _worker_state["timetable"],
+            deadline=request.get("deadline"),
+            max_attempts=request.get("max_attempts", 200)
+        )
+        return {
+            "request_id": request_id,
+            "status": "ok" if best_path is not None else "no_path",
+            "best_path": _path_to_dict(best_path) if best_path is not None else None,
+            "alternatives": [_path_to_dict(p) for p in alternatives[:num_alternatives]],
+            "stats": asdict(path_finder.last_search_stats),
+        }
+    except Exception as e:
+        return {"request_id": request_id, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def _read_requests(stream: IO[str], done: Set[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (request_id, line) lazily, skipping blank lines and finished requests"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request_id = str(json.loads(line).get("request_id", f"line-{line_number}"))
+        except (ValueError, AttributeError):
+            request_id = f"line-{line_number}"
+        if request_id not in done:
+            yield request_id, line
+
+
+def _load_checkpoint(path: Optional[str]) -> Tuple[Optional[dict], Set[str]]:
+    """Timetable settings (from "# {...}" lines) and finished request ids"""
+    settings, done = None, set()
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.startswith("# "):
+                    settings = json.loads(line[2:])
+                elif line.strip():
+                    done.add(line)
+    except (TypeError, FileNotFoundError):
+        pass
+    return settings, done
+
+
+def _load_output(path: str) -> Tuple[Set[str], bool]:
+    """Request ids already written to ``path`` and whether its last line is incomplete"""
+    written, incomplete = set(), False
+    try:
+        with open(path) as f:
+            for line in f:
+                incomplete = not line.endswith("\n")
+                try:
+                    written.add(str(json.loads(line)["request_id"]))
+                except (ValueError, KeyError, TypeError):
+                    pass
+    except FileNotFoundError:
+        pass
+    return written, incomplete
+
+
+def run_batch(requests: Iterator[Tuple[str, str]],
+              output: IO[str],
+              checkpoint: Optional[IO[str]],
+              workers: Optional[int],
+              ordered: bool,
+              num_alternatives: int,
+              initargs: tuple) -> int:
+    """Fan requests out to a process pool and stream results; return the count written.
+
+    At most ``window`` requests are pending (submitted but not yet written) at
+    any time, so memory does not depend on the size of the input. With
+    ``ordered`` results are written in input order, otherwise as they complete.
+    """
+    written = 0
+    workers = workers or os.cpu_count() or 1
+    window = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        in_flight = {}  # future -> sequence number
+        finished = {}   # sequence number -> result, only used when ordered
+        next_to_write = 0
+        submitted = 0
+        exhausted = False
+
+        def emit(result: dict):
+            nonlocal written
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            if checkpoint is not None:
+                checkpoint.write(result["request_id"] + "\n")
+                checkpoint.flush()
+            written += 1
+
+        while True:
+            while not exhausted and submitted - written < window:
+                job = next(requests, None)
+                if job is None:
+                    exhausted = True
+                    break
+                request_id, line = job
+                in_flight[pool.submit(_solve, (request_id, line, num_alternatives))] = submitted
+                submitted += 1
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                sequence = in_flight.pop(future)
+                if ordered:
+                    finished[sequence] = future.result()
+                else:
+                    emit(future.result())
+            while next_to_write in finished:
+                emit(finished.pop(next_to_write))
+                next_to_write += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find freight paths for a stream of JSONL requests")
+    parser.add_argument("input", nargs="?", default="-", help="request file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="result file, or - for stdout")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--ordered", action="store_true", help="write results in input order")
+    parser.add_argument("--checkpoint", help="file recording finished request ids, used to resume")
+    parser.add_argument("--alternatives", type=int, default=5, help="alternatives to report per request")
+    parser.add_argument("--timetable-date", help="ISO start of the dummy timetable (default: 06:00 today, "
+                        "or the date recorded in --checkpoint)")
+    parser.add_argument("--timetable-trains", type=int, default=10, help="trains in the dummy timetable")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the dummy timetable")
+    args = parser.parse_args(argv)
+
+    settings = {"timetable_date": args.timetable_date, "timetable_trains": args.timetable_trains,
+                "seed": args.seed}
+    recorded, done = _load_checkpoint(args.checkpoint)
+    if recorded is not None:
+        if settings["timetable_date"] is None:
+            settings["timetable_date"] = recorded["timetable_date"]
+        if settings != recorded:
+            parser.error(f"checkpoint was written with timetable settings {recorded}, not {settings}")
+    elif done and settings["timetable_date"] is None:
+        parser.error("checkpoint does not record the timetable date; pass --timetable-date")
+    elif settings["timetable_date"] is None:
+        settings["timetable_date"] = datetime.now().replace(
+            hour=6, minute=0, second=0, microsecond=0).isoformat()
+
+    incomplete = False
+    if args.output != "-" and (done or recorded is not None):
+        already_written, incomplete = _load_output(args.output)
+        done |= already_written
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input)
+    # Resuming appends to the previous output instead of truncating it
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "a" if done else "w")
+    if incomplete and done:
+        output_stream.write("\n")  # close a record cut off by a crash
+    checkpoint_stream = open(args.checkpoint, "a") if args.checkpoint else None
+    if checkpoint_stream is not None and recorded is None:
+        checkpoint_stream.write("# " + json.dumps(settings) + "\n")
+        checkpoint_stream.flush()
+    try:
+        written = run_batch(
+            _read_requests(input_stream, done), output_stream, checkpoint_stream,
+            args.workers, args.ordered, args.alternatives,
+            (settings["timetable_date"], settings["timetable_trains"], settings["seed"])
+        )
+    finally:
+        for stream in (input_stream, output_stream, checkpoint_stream):
+            if stream not in (None, sys.stdin, sys.stdout):
+                stream.close()
+    print(f"Wrote {written} results ({len(done)} skipped from checkpoint)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ setup(
         'numpy>=1.21.0',
         'pandas>=1.3.0',
         'scikit-learn>=0.24.0',
+        'scipy>=1.9.0',
         'plotly>=5.1.0',
     ],
     author="Umar",
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 import numpy as np
 from src.models.core.infrastructure import Infrastructure
 from src.models.core.train import TrainService, TrainPath, Direction
+from src.models.core.timetable import TimetableSnapshot
 from src.data.processors.data_preprocessor import TimetableGenerator
 from src.models.ml.path_success_predictor import PathSuccessPredictor
 from src.models.ml.congestion_analyzer import CongestionAnalyzer
@@ -17,15 +18,16 @@ def main():
     
     # Generate dummy timetable
     timetable_gen = TimetableGenerator()
-    existing_paths = timetable_gen.generate_dummy_timetable(num_trains=10)
-    print(f"\nGenerated {len(existing_paths)} existing train paths")
+    timetable = TimetableSnapshot.from_paths(timetable_gen.generate_dummy_timetable(num_trains=10))
+    existing_paths = timetable.paths
+    print(f"\nGenerated {len(timetable)} existing train paths")
     
     # Initialize ML models
     print("\nInitializing ML models...")
     success_predictor = PathSuccessPredictor()
     
     # Create balanced training data
-    training_paths = existing_paths.copy()
+    training_paths = list(existing_paths)
     
     # Add some "unsuccessful" variations
     for path in existing_paths[:5]:
@@ -64,7 +66,7 @@ def main():
     print(f"\nFinding best path starting at {start_time.strftime('%H:%M')}")
     # Find paths
     # After finding the best path
-    best_path, alternative_paths = path_finder.find_best_path(freight_train, start_time, existing_paths)
+    best_path, alternative_paths = path_finder.find_best_path(freight_train, start_time, timetable)
 
     if best_path:
         print("\nFound optimal path for freight train:")
@@ -82,7 +84,7 @@ def main():
         
         # Visualize
         viz = TimeSpaceDiagram(infrastructure.sections)
-        fig = viz.create_diagram(existing_paths, best_path, alternative_paths)
+        fig = viz.create_diagram(timetable, best_path, alternative_paths)
         fig.show()
     else:
         print("\nNo feasible path found.")
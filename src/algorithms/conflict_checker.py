@@ -1,50 +1,124 @@
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
+import numpy as np
 from ..models.core.train import TrainPath
+from ..models.core.infrastructure import DIRECTION_CODES
+
+_EPOCH = datetime(2000, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_UNKNOWN = -2  # code of a section no existing path uses; padding is -1
+
+
+def _micros(time: datetime) -> int:
+    return (time - _EPOCH) // _MICROSECOND
+
+
+class ScheduleColumns:
+    """Existing paths as integer (n_paths, n_entries) arrays.
+
+    Entry j of row p holds the section code, the entry time and the end of the
+    dwell of the j-th schedule entry of ``paths[p]``, in whole microseconds
+    since 2000-01-01 so comparisons are exact. Sections are coded with
+    ``section_index`` when given (e.g. ``Infrastructure.section_index``) and
+    interned in order of appearance otherwise. Build it once per timetable
+    and pass it in place of the path list to check many candidates.
+    """
+
+    def __init__(self, paths: Iterable[TrainPath], section_index: Optional[Dict[str, int]] = None):
+        self.paths = list(paths)
+        self.section_index = section_index if section_index is not None else {}
+        width = max((len(path.schedule) for path in self.paths), default=0)
+        shape = (len(self.paths), width)
+        self.section = np.full(shape, -1, dtype=np.int64)
+        self.start = np.zeros(shape, dtype=np.int64)
+        self.dwell_end = np.zeros(shape, dtype=np.int64)
+        self.direction = np.array([DIRECTION_CODES[path.train.direction] for path in self.paths], dtype=np.int8)
+        intern = section_index is None
+        for row, path in enumerate(self.paths):
+            for j, (section_id, entry, dwell) in enumerate(path.schedule):
+                if intern:
+                    code = self.section_index.setdefault(section_id, len(self.section_index))
+                else:
+                    code = self.section_index[section_id]
+                self.section[row, j] = code
+                self.start[row, j] = _micros(entry)
+                self.dwell_end[row, j] = _micros(entry + timedelta(minutes=dwell))
+        self.valid = self.section >= 0
+
+    @property
+    def width(self) -> int:
+        return self.section.shape[1]
+
+    def encode(self, path: TrainPath) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Section codes, entry times and dwell ends of a candidate path"""
+        codes = np.array([self.section_index.get(section_id, _UNKNOWN) for section_id, _, _ in path.schedule],
+                         dtype=np.int64)
+        starts = np.array([_micros(entry) for _, entry, _ in path.schedule], dtype=np.int64)
+        ends = np.array([_micros(entry + timedelta(minutes=dwell)) for _, entry, dwell in path.schedule],
+                        dtype=np.int64)
+        return codes, starts, ends
+
 
 class ConflictChecker:
-    def __init__(self, min_headway_minutes: float = 5):
+    def __init__(self, min_headway_minutes: float = 5, verbose: bool = True):
         self.min_headway = timedelta(minutes=min_headway_minutes)
-    
-    def check_conflicts(self, path: TrainPath, existing_paths: List[TrainPath]) -> List[dict]:
+        self.verbose = verbose
+        self._snapshot_columns: Optional[Tuple[str, ScheduleColumns]] = None
+
+    def columns(self, existing_paths: Union[List[TrainPath], ScheduleColumns]) -> ScheduleColumns:
+        """Integer columns of ``existing_paths``, reused while a snapshot version is unchanged"""
+        if isinstance(existing_paths, ScheduleColumns):
+            return existing_paths
+        version = getattr(existing_paths, "version", None)
+        if version is not None and self._snapshot_columns is not None and self._snapshot_columns[0] == version:
+            return self._snapshot_columns[1]
+        columns = ScheduleColumns(existing_paths)
+        if version is not None:
+            self._snapshot_columns = (version, columns)
+        return columns
+
+    def check_conflicts(self, path: TrainPath,
+                        existing_paths: Union[List[TrainPath], ScheduleColumns]) -> List[dict]:
         """Check for conflicts between proposed path and existing paths"""
         conflicts = []
-        print(f"\nChecking conflicts for train {path.train.id}")
-        
-        for existing_path in existing_paths:
-            # Skip paths in opposite direction (already handled by crossing check)
-            if path.train.direction != existing_path.train.direction:
-                continue
-                
-            for (section1, time1, dwell1), (section2, time2, dwell2) in zip(
-                path.schedule, existing_path.schedule
-            ):
-                if section1 == section2:  # Same section
-                    # Consider dwell times in conflict detection
-                    path_start = time1
-                    path_end = time1 + timedelta(minutes=dwell1)
-                    existing_start = time2
-                    existing_end = time2 + timedelta(minutes=dwell2)
-                    
-                    # Check if time windows overlap considering headway
-                    if (
-                        path_start <= existing_end + self.min_headway and 
-                        existing_start <= path_end + self.min_headway
-                    ):
-                        conflicts.append({
-                            'section': section1,
-                            'train1': path.train.id,
-                            'train2': existing_path.train.id,
-                            'time': time1,
-                            'dwell_time': dwell1,
-                            'conflict_type': 'headway_violation',
-                            'headway_violation': (
-                                self.min_headway - min(
-                                    abs(path_end - existing_start),
-                                    abs(existing_end - path_start)
-                                )
-                            ).total_seconds() / 60
-                        })
-                        print(f"Found conflict in section {section1} between {path.train.id} and {existing_path.train.id}")
-        
-        return conflicts
\ No newline at end of file
+        if self.verbose:
+            print(f"\nChecking conflicts for train {path.train.id}")
+
+        columns = self.columns(existing_paths)
+        width = min(len(path.schedule), columns.width)
+        if not width:
+            return conflicts
+        codes, starts, ends = columns.encode(path)
+        codes, starts, ends = codes[:width], starts[:width], ends[:width]
+        headway = self.min_headway // _MICROSECOND
+        # Paths in the opposite direction are skipped (already handled by crossing check);
+        # entries are paired by position and compared on the same section, dwell included
+        hits = ((columns.direction == DIRECTION_CODES[path.train.direction])[:, None] &
+                (columns.section[:, :width] == codes) &
+                (starts <= columns.dwell_end[:, :width] + headway) &
+                (columns.start[:, :width] <= ends + headway))
+
+        for row, j in zip(*np.nonzero(hits)):
+            existing_path = columns.paths[row]
+            section1, time1, dwell1 = path.schedule[j]
+            _, time2, dwell2 = existing_path.schedule[j]
+            path_end = time1 + timedelta(minutes=dwell1)
+            existing_end = time2 + timedelta(minutes=dwell2)
+            conflicts.append({
+                'section': section1,
+                'train1': path.train.id,
+                'train2': existing_path.train.id,
+                'time': time1,
+                'dwell_time': dwell1,
+                'conflict_type': 'headway_violation',
+                'headway_violation': (
+                    self.min_headway - min(
+                        abs(path_end - time2),
+                        abs(existing_end - time1)
+                    )
+                ).total_seconds() / 60
+            })
+            if self.verbose:
+                print(f"Found conflict in section {section1} between {path.train.id} and {existing_path.train.id}")
+
+        return conflicts
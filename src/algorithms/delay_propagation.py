@@ -0,0 +1,295 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import time
+import numpy as np
+from ..models.core.train import TrainPath
+from ..models.core.infrastructure import Infrastructure, DIRECTION_CODES
+from ..models.core.timetable import TimetableSnapshot
+from .time_windows import free_intervals
+
+_EPSILON = 1e-3  # minutes; the ConflictChecker treats a gap of exactly the headway as a conflict
+
+class ColumnarSchedule:
+    """Paths laid out as (n_paths, n_entries) arrays, times in minutes from ``reference``.
+
+    Shorter schedules are padded; ``valid`` marks real entries. ``min_dwell`` is
+    the larger of the train's and the section's minimum dwell at stops and 0
+    where the train runs through.
+    """
+
+    def __init__(self, paths: Sequence[TrainPath], infrastructure: Infrastructure, reference: datetime):
+        self.paths = list(paths)
+        self.reference = reference
+        width = max((len(path.schedule) for path in self.paths), default=0)
+        shape = (len(self.paths), width)
+        self.valid = np.zeros(shape, dtype=bool)
+        self.section = np.full(shape, -1, dtype=np.int32)
+        self.start = np.zeros(shape)
+        self.dwell = np.zeros(shape)
+        self.min_dwell = np.zeros(shape)
+        self.direction = np.array([DIRECTION_CODES[path.train.direction] for path in self.paths],
+                                  dtype=np.int8)
+        for p, path in enumerate(self.paths):
+            for j, (section_id, entry_time, dwell) in enumerate(path.schedule):
+                self.valid[p, j] = True
+                self.section[p, j] = infrastructure.section_index[section_id]
+                self.start[p, j] = (entry_time - reference).total_seconds() / 60
+                self.dwell[p, j] = dwell
+                if dwell > 0:
+                    self.min_dwell[p, j] = max(path.train.min_dwell_time,
+                                               infrastructure.sections[section_id].min_dwell_time)
+
+    def absorb(self, injected: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Carry arrival delays along every schedule at once.
+
+        ``injected[p, j]`` is a delay forced on train p when it enters entry j.
+        At each stop the delay is reduced by the dwell slack above minimum dwell.
+        Returns the arrival delay and the new dwell per entry.
+        """
+        slack = np.where(self.valid, np.maximum(self.dwell - self.min_dwell, 0.0), 0.0)
+        arrival = np.zeros_like(injected)
+        carry = np.zeros(injected.shape[0])
+        for j in range(injected.shape[1]):
+            arrival[:, j] = np.maximum(carry, injected[:, j])
+            carry = arrival[:, j] - np.minimum(arrival[:, j], slack[:, j])
+        arrival = np.where(self.valid, arrival, 0.0)
+        return arrival, self.dwell - np.minimum(arrival, slack)
+
+    def rebuild(self, p: int, arrival: np.ndarray, dwell: np.ndarray) -> TrainPath:
+        """TrainPath for row ``p`` with delayed entries and reduced dwells"""
+        path = self.paths[p]
+        schedule = [
+            (section_id, entry_time + timedelta(minutes=float(arrival[p, j])), float(dwell[p, j]))
+            for j, (section_id, entry_time, _) in enumerate(path.schedule)
+        ]
+        return TrainPath(path.train, schedule, list(path.speeds), list(path.platforms))
+
+
+class _LeaderPrefix:
+    """Running maximum over the leaders that entered a follower's group strictly before it.
+
+    Groups are non-negative integers; leaders and followers are given by group
+    and original entry time. ``max`` evaluates the maximum of a per-leader value
+    for every follower (-inf when it has no leader) without a Python loop.
+    """
+
+    def __init__(self,
+                 leader_group: np.ndarray,
+                 leader_start: np.ndarray,
+                 follower_group: np.ndarray,
+                 follower_start: np.ndarray):
+        self.order = np.lexsort((leader_start, leader_group))
+        self.group = leader_group[self.order]
+        self.found = np.zeros(len(follower_group), dtype=bool)
+        self.position = np.zeros(len(follower_group), dtype=np.int64)
+        if not len(self.order) or not len(follower_group):
+            return
+        low = min(leader_start.min(), follower_start.min())
+        span = max(leader_start.max(), follower_start.max()) - low + 1.0
+        keys = self.group * span + (leader_start[self.order] - low)
+        position = np.searchsorted(keys, follower_group * span + (follower_start - low), side="left") - 1
+        self.position = np.maximum(position, 0)
+        self.found = (position >= 0) & (self.group[self.position] == follower_group)
+
+    def max(self, values: np.ndarray) -> np.ndarray:
+        if not self.found.any():
+            return np.full(len(self.found), -np.inf)
+        ordered = values[self.order]
+        low = ordered.min()
+        span = ordered.max() - low + 1.0
+        # Offsetting each group above the previous one turns a running max into a per-group one
+        running = np.maximum.accumulate(ordered - low + self.group * span) - self.group * span + low
+        return np.where(self.found, running[self.position], -np.inf)
+
+
+def _knock_on_shift(prefix: _LeaderPrefix,
+                    old: np.ndarray,
+                    new: np.ndarray,
+                    follower_start: np.ndarray,
+                    gap: float) -> np.ndarray:
+    """Delay a follower needs so it still starts ``gap`` after its leaders' (moved) value.
+
+    A follower only absorbs the part of its leaders' move that exceeds the
+    slack it originally had; a pre-existing shortfall is not repaired.
+    """
+    has_leader = prefix.found
+    leader_old = np.where(has_leader, prefix.max(old), 0.0)
+    leader_new = np.where(has_leader, prefix.max(new), 0.0)
+    slack = np.where(has_leader, np.maximum(follower_start - leader_old - gap, 0.0), 0.0)
+    return np.maximum(leader_new - leader_old - slack, 0.0)
+
+
+@dataclass
+class DelayPropagationResult:
+    timetable: TimetableSnapshot
+    replaced: List[Tuple[TrainPath, TrainPath]] = field(default_factory=list)  # (old, new)
+    rounds: int = 0
+
+
+class DelayPropagator:
+    """Pushes a delay through a path and the trains queued behind it.
+
+    The delayed train loses its delay as dwell slack allows. Trains that
+    originally followed a moved train are delayed by however much it now eats
+    into the gap they previously left: on the same section in the same
+    direction the headway, and on the same base section in the opposite
+    direction the section itself (a following train may only enter once the
+    other has left). This is repeated until no train moves. Only trains whose
+    type is in ``knock_on_train_types`` (and the delayed train) take part —
+    the rest (freight by default) are left in place for re-planning.
+    """
+
+    def __init__(self,
+                 infrastructure: Infrastructure,
+                 min_headway_minutes: float = 5,
+                 knock_on_train_types: Tuple[str, ...] = ("passenger",),
+                 max_rounds: int = 100):
+        self.infrastructure = infrastructure
+        self.min_headway = min_headway_minutes
+        self.knock_on_train_types = knock_on_train_types
+        self.max_rounds = max_rounds
+
+    def propagate(self,
+                  timetable: Iterable[TrainPath],
+                  delayed_path: TrainPath,
+                  delay_minutes: float,
+                  at_entry: int = 0) -> DelayPropagationResult:
+        """Delay ``delayed_path`` (matched by identity) by ``delay_minutes`` from entry ``at_entry``"""
+        if not isinstance(timetable, TimetableSnapshot):
+            timetable = TimetableSnapshot.from_paths(timetable)
+        paths = timetable.paths
+        row = next((p for p, path in enumerate(paths) if path is delayed_path), None)
+        if row is None:
+            raise KeyError(f"Path for train {delayed_path.train.id} is not in the timetable")
+        if not 0 <= at_entry < len(delayed_path.schedule):
+            raise ValueError(f"at_entry {at_entry} is outside the schedule of train {delayed_path.train.id} "
+                             f"({len(delayed_path.schedule)} entries)")
+
+        columns = ColumnarSchedule(paths, self.infrastructure, min(path.start_time for path in paths))
+        injected = np.zeros_like(columns.start)
+        injected[row, at_entry] = delay_minutes
+        knock_on = np.array([path.train.train_type in self.knock_on_train_types for path in paths])
+        knock_on[row] = True
+
+        # Entries of trains that take part, and those that also have a next entry
+        rows, cols = np.nonzero(columns.valid & knock_on[:, None])
+        start = columns.start[rows, cols]
+        direction = columns.direction[rows].astype(np.int64)
+        has_next = np.zeros(len(rows), dtype=bool)
+        inner = cols + 1 < columns.valid.shape[1]
+        has_next[inner] = columns.valid[rows[inner], cols[inner] + 1]
+        next_rows, next_cols = rows[has_next], cols[has_next] + 1
+
+        # Same direction, same section: leaders' end of dwell plus headway
+        follow = _LeaderPrefix(columns.section[rows, cols] * 2 + direction, start,
+                               columns.section[rows, cols] * 2 + direction, start)
+        # Opposite direction, same base section: leaders' exit (next entry)
+        base = self.infrastructure.base_sections[columns.section[rows, cols]].astype(np.int64)
+        cross = _LeaderPrefix((base * 2 + direction)[has_next], start[has_next],
+                              (base * 2 + 1 - direction)[has_next], start[has_next])
+        end_old = start + columns.dwell[rows, cols]
+        exit_old = columns.start[next_rows, next_cols]
+
+        rounds = 0
+        while True:
+            rounds += 1
+            arrival, dwell = columns.absorb(injected)
+            end_new = start + arrival[rows, cols] + dwell[rows, cols]
+            exit_new = exit_old + arrival[next_rows, next_cols]
+            required = _knock_on_shift(follow, end_old, end_new, start, self.min_headway + _EPSILON)
+            required[has_next] = np.maximum(
+                required[has_next],
+                _knock_on_shift(cross, exit_old, exit_new, start[has_next], _EPSILON)
+            )
+            extra = required - arrival[rows, cols]
+            if rounds >= self.max_rounds or not np.any(extra > 1e-9):
+                break
+            np.maximum.at(injected, (rows, cols), np.where(extra > 1e-9, required, 0.0))
+
+        result = DelayPropagationResult(timetable, rounds=rounds)
+        for p in np.flatnonzero(np.any(arrival > 1e-9, axis=1)):
+            new_path = columns.rebuild(p, arrival, dwell)
+            result.timetable = result.timetable.replace_path(paths[p], new_path)
+            result.replaced.append((paths[p], new_path))
+        return result
+
+
+@dataclass
+class ReplanResult:
+    timetable: TimetableSnapshot
+    replaced: List[Tuple[TrainPath, Optional[TrainPath]]] = field(default_factory=list)  # (old, new or None)
+    elapsed: float = 0.0
+
+
+class FreightReplanner:
+    """Re-plans the freight paths that conflict with an updated timetable.
+
+    Each affected freight train is first warm-started by keeping its speed and
+    dwell profile and shifting it to the earliest free departure; a short anytime
+    search from its original departure may then find an earlier arrival.
+    Trains are re-planned in order of their original departure, each against
+    the timetable including the replacements made so far.
+    """
+
+    def __init__(self,
+                 path_finder,
+                 budget_per_train: float = 0.2,
+                 freight_train_types: Tuple[str, ...] = ("freight",)):
+        self.path_finder = path_finder
+        self.budget_per_train = budget_per_train
+        self.freight_train_types = freight_train_types
+
+    def _conflicts(self, path: TrainPath, others: Iterable[TrainPath]) -> bool:
+        others = [other for other in others if other is not path]
+        return bool(self.path_finder._is_path_crossing(path, others) or
+                    self.path_finder.conflict_checker.check_conflicts(path, others))
+
+    def affected_freight(self, timetable: TimetableSnapshot) -> List[TrainPath]:
+        """Freight paths in ``timetable`` that now clash with another path"""
+        return [path for path in timetable
+                if path.train.train_type in self.freight_train_types and self._conflicts(path, timetable)]
+
+    def _warm_start(self, path: TrainPath, others: Sequence[TrainPath]) -> Optional[TrainPath]:
+        """Same running profile as ``path``, moved to its earliest free departure"""
+        finder = self.path_finder
+        offsets = [(entry_time - path.start_time).total_seconds() / 60 for _, entry_time, _ in path.schedule]
+        dwells = [dwell for _, _, dwell in path.schedule]
+        infra = finder.infrastructure
+        sections = [infra.section_index[section_id] for section_id, _, _ in path.schedule]
+        bases = [infra.section_base[section_id] for section_id, _, _ in path.schedule]
+        horizon = timedelta(days=1)
+        occupancy = finder._occupancy_table(others, path.start_time, path.start_time,
+                                            path.start_time + horizon, offsets[-1] + dwells[-1])
+        blocked = occupancy.blocked_departures(sections, bases, offsets, dwells, path.train.direction,
+                                               finder.conflict_checker.min_headway.total_seconds() / 60)
+        free = free_intervals(blocked, 0.0, horizon.total_seconds() / 60)
+        # Interval ends touch a blocked departure, so stay strictly inside
+        free = free[free[:, 1] - free[:, 0] > 2 * _EPSILON]
+        if not len(free):
+            return None
+        shift = timedelta(minutes=float(free[0, 0]) + (_EPSILON if free[0, 0] > 0 else 0.0))
+        return TrainPath(path.train,
+                         [(section_id, entry_time + shift, dwell) for section_id, entry_time, dwell in path.schedule],
+                         list(path.speeds), list(path.platforms))
+
+    def replan(self, timetable: TimetableSnapshot) -> ReplanResult:
+        """Replace every affected freight path; a replacement of None means no slot was found"""
+        started = time.monotonic()
+        result = ReplanResult(timetable)
+        for old_path in sorted(self.affected_freight(timetable), key=lambda p: p.start_time):
+            others = result.timetable.without_path(old_path)
+            candidates = []
+            warm = self._warm_start(old_path, others)
+            if warm is not None and not self._conflicts(warm, others):
+                candidates.append(warm)
+            best, alternatives = self.path_finder.find_best_path(
+                old_path.train, old_path.start_time, others,
+                deadline=self.budget_per_train, max_attempts=None
+            )
+            candidates.extend(p for p in [best] + alternatives if p is not None)
+            new_path = min(candidates, key=lambda p: p.end_time, default=None)
+            result.timetable = others if new_path is None else others.with_path(new_path)
+            result.replaced.append((old_path, new_path))
+        result.elapsed = time.monotonic() - started
+        return result
@@ -0,0 +1,255 @@
+from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import time
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+from ..models.core.train import TrainPath, TrainService
+from ..models.core.infrastructure import DIRECTION_CODES
+
+_EPSILON = 1e-3  # minutes; turns the checkers' strict inequalities into closed ones
+_DEPARTURE_WEIGHT = 1e-4  # tie-break towards earlier departures
+
+
+@dataclass
+class InsertionResult:
+    path: Optional[TrainPath]
+    journey_time: Optional[float]
+    status: str  # "optimal", "time_limit", "infeasible" or "warm_start"
+    gap: Optional[float]  # relative optimality gap reported by the solver
+    solve_time: float
+    warm_start: Optional[TrainPath] = None
+
+
+class InsertionSolver:
+    """Exact freight insertion as a mixed-integer linear program, solved with HiGHS.
+
+    Decision variables are the departure within the path finder's departure
+    window, the running time on every route section (between full speed and
+    ``min_speed_factor`` of it) and the dwell at every stop. Each existing
+    occupancy that may interact with the new train contributes one disjunction,
+    encoded with a binary and a big-M: the new train either clears a same-
+    direction occupancy by the headway before or after it, or leaves an opposite-
+    direction section occupancy before it starts or enters after it ends.
+    Occupancies that bounds alone keep clear are dropped, and one-sided ones
+    become plain constraints. The objective is journey time as computed by
+    ``TrainPath.calculate_journey_time``.
+
+    The fastest heuristic path is used as a warm start: when it satisfies the
+    model, its journey time becomes an objective cutoff, and it is returned if
+    the solver finds nothing better within ``time_limit``. The last section is
+    run at full speed, since its running time does not affect either.
+    """
+
+    def __init__(self, path_finder, time_limit: float = 10.0, min_speed_factor: float = 0.6):
+        self.path_finder = path_finder
+        self.time_limit = time_limit
+        self.min_speed_factor = min_speed_factor
+
+    def solve(self,
+              train: TrainService,
+              start_time: datetime,
+              existing_paths: List[TrainPath],
+              warm_start: Optional[TrainPath] = None,
+              heuristic_deadline: float = 0.2) -> InsertionResult:
+        started = time.monotonic()
+        finder = self.path_finder
+        if warm_start is None:
+            warm_start, _ = finder.find_best_path(train, start_time, existing_paths,
+                                                  deadline=heuristic_deadline, max_attempts=None)
+
+        profile = finder._route_profile(train)
+        n = len(profile.section_ids)
+        window_start, window_end = finder._departure_window(start_time)
+        headway = finder.conflict_checker.min_headway.total_seconds() / 60
+
+        # Variables: departure, running time per section, dwell per section, then binaries
+        d_idx, r_idx, w_idx = 0, 1, 1 + n
+        num_continuous = 1 + 2 * n
+        lower = np.zeros(num_continuous)
+        upper = np.zeros(num_continuous)
+        upper[d_idx] = (window_end - window_start).total_seconds() / 60
+        lower[r_idx:r_idx + n] = profile.base_running_times
+        upper[r_idx:r_idx + n] = np.asarray(profile.base_running_times) / self.min_speed_factor
+        # The last section's running time is in no constraint and not part of the
+        # journey time, so it would be arbitrary: run it at full speed
+        upper[r_idx + n - 1] = lower[r_idx + n - 1]
+        for i in range(n):
+            if profile.has_platforms[i]:
+                lower[w_idx + i] = train.min_dwell_time
+                upper[w_idx + i] = train.max_dwell_time * 1.5
+        occupancy = finder._occupancy_table(existing_paths, window_start, window_start, window_end,
+                                            float(upper[r_idx:].sum()))
+
+        def entry(i: int) -> np.ndarray:
+            row = np.zeros(num_continuous)
+            row[d_idx] = 1
+            row[r_idx:r_idx + i] = 1
+            row[w_idx:w_idx + i] = 1
+            return row
+
+        entries = [entry(i) for i in range(n)]
+
+        # Disjunctions: (row_a, rhs_a) means row_a @ x >= rhs_a ("after"),
+        # (row_b, rhs_b) means row_b @ x <= rhs_b ("before")
+        disjunctions: List[Tuple[np.ndarray, float, np.ndarray, float]] = []
+        hard_rows, hard_lb, hard_ub = [], [], []
+        infeasible = False
+
+        def add_disjunction(row_a, rhs_a, row_b, rhs_b):
+            nonlocal infeasible
+            a_min, a_max = _row_range(row_a, lower, upper)
+            b_min, b_max = _row_range(row_b, lower, upper)
+            if a_min >= rhs_a or b_max <= rhs_b:
+                return  # always clear
+            a_possible, b_possible = a_max >= rhs_a, b_min <= rhs_b
+            if a_possible and b_possible:
+                disjunctions.append((row_a, rhs_a, row_b, rhs_b))
+            elif a_possible:
+                hard_rows.append(row_a); hard_lb.append(rhs_a); hard_ub.append(np.inf)
+            elif b_possible:
+                hard_rows.append(row_b); hard_lb.append(-np.inf); hard_ub.append(rhs_b)
+            else:
+                infeasible = True
+
+        same_direction = occupancy.direction == DIRECTION_CODES[train.direction]
+        crossing_rows = ~same_direction & occupancy.has_next
+        for i in range(n):
+            dwell_row = np.zeros(num_continuous)
+            dwell_row[w_idx + i] = 1
+            for k in np.flatnonzero(same_direction & (occupancy.section == profile.sections[i])):
+                add_disjunction(entries[i], occupancy.dwell_end[k] + headway + _EPSILON,
+                                entries[i] + dwell_row, occupancy.start[k] - headway - _EPSILON)
+            if i + 1 < n:
+                for k in np.flatnonzero(crossing_rows & (occupancy.base == profile.bases[i])):
+                    add_disjunction(entries[i], occupancy.next_entry[k],
+                                    entries[i + 1], occupancy.start[k])
+
+        journey = np.zeros(num_continuous)
+        journey[r_idx:r_idx + n - 1] = 1
+        journey[w_idx:w_idx + n] = 1
+
+        if infeasible:
+            return self._fallback(warm_start, "infeasible", None, started)
+
+        # Warm start: valid cutoff only if it satisfies this model
+        warm_x = self._warm_start_vector(warm_start, profile, window_start, num_continuous,
+                                         d_idx, r_idx, w_idx) if warm_start is not None else None
+        if warm_x is not None and not self._satisfies(warm_x, lower, upper, hard_rows, hard_lb,
+                                                      hard_ub, disjunctions):
+            warm_x = None
+
+        # Constraint matrix in sparse form: each row touches at most 2n + 1
+        # continuous variables and one binary, so it stays linear in m
+        m = len(disjunctions)
+        data, row_ids, col_ids, lbs, ubs = [], [], [], [], []
+
+        def add_row(row, lb, ub, binary=None, coefficient=0.0):
+            nonzero = np.flatnonzero(row)
+            data.extend(row[nonzero]); col_ids.extend(nonzero); row_ids.extend([len(lbs)] * len(nonzero))
+            if binary is not None:
+                data.append(coefficient); col_ids.append(num_continuous + binary); row_ids.append(len(lbs))
+            lbs.append(lb); ubs.append(ub)
+
+        for row, lb, ub in zip(hard_rows, hard_lb, hard_ub):
+            add_row(row, lb, ub)
+        for j, (row_a, rhs_a, row_b, rhs_b) in enumerate(disjunctions):
+            big_m_a = rhs_a - _row_range(row_a, lower, upper)[0]
+            big_m_b = _row_range(row_b, lower, upper)[1] - rhs_b
+            add_row(row_a, rhs_a, np.inf, j, big_m_a)
+            add_row(row_b, -np.inf, rhs_b + big_m_b, j, big_m_b)
+        if warm_x is not None:
+            add_row(journey, -np.inf, journey @ warm_x + 1e-6)
+        matrix = sparse.csr_matrix((data, (row_ids, col_ids)), shape=(len(lbs), num_continuous + m))
+
+        objective = np.concatenate([journey, np.zeros(m)])
+        objective[d_idx] += _DEPARTURE_WEIGHT
+        result = milp(
+            objective,
+            constraints=LinearConstraint(matrix, lbs, ubs) if lbs else None,
+            integrality=np.concatenate([np.zeros(num_continuous), np.ones(m)]),
+            bounds=Bounds(np.concatenate([lower, np.zeros(m)]), np.concatenate([upper, np.ones(m)])),
+            options={"time_limit": self.time_limit}
+        )
+
+        if result.x is None:
+            if result.status == 2 and warm_x is not None:
+                # Nothing beats the cutoff: the warm start is optimal for this model
+                return self._fallback(warm_start, "optimal", 0.0, started)
+            status = "time_limit" if result.status == 1 else "infeasible"
+            return self._fallback(warm_start, status, None, started)
+
+        path = self._build_path(train, profile, result.x, window_start, n, d_idx, r_idx, w_idx, warm_start)
+        others = list(existing_paths)
+        if finder._is_path_crossing(path, others) or finder.conflict_checker.check_conflicts(path, others):
+            # Should not happen as the model is stricter than the checkers; keep the heuristic path
+            return self._fallback(warm_start, "warm_start" if warm_start is not None else "infeasible",
+                                  None, started)
+        return InsertionResult(
+            path=path,
+            journey_time=path.calculate_journey_time(),
+            status="optimal" if result.status == 0 else "time_limit",
+            gap=result.mip_gap if m else 0.0,
+            solve_time=time.monotonic() - started,
+            warm_start=warm_start
+        )
+
+    @staticmethod
+    def _fallback(warm_start: Optional[TrainPath], status: str, gap: Optional[float],
+                  started: float) -> InsertionResult:
+        return InsertionResult(
+            path=warm_start,
+            journey_time=warm_start.calculate_journey_time() if warm_start is not None else None,
+            status=status,
+            gap=gap,
+            solve_time=time.monotonic() - started,
+            warm_start=warm_start
+        )
+
+    def _warm_start_vector(self, path: TrainPath, profile, reference: datetime,
+                           num_continuous: int, d_idx: int, r_idx: int, w_idx: int) -> Optional[np.ndarray]:
+        """Express a heuristic path in the model's variables, or None if it does not fit the route"""
+        if [section_id for section_id, _, _ in path.schedule] != profile.section_ids:
+            return None
+        x = np.zeros(num_continuous)
+        entries = [(entry_time - reference).total_seconds() / 60 for _, entry_time, _ in path.schedule]
+        x[d_idx] = entries[0]
+        for i, (_, _, dwell) in enumerate(path.schedule):
+            x[w_idx + i] = dwell
+            if i + 1 < len(entries):
+                x[r_idx + i] = entries[i + 1] - entries[i] - dwell
+            else:
+                x[r_idx + i] = profile.base_running_times[i]  # fixed to full speed in the model
+        return x
+
+    @staticmethod
+    def _satisfies(x, lower, upper, hard_rows, hard_lb, hard_ub, disjunctions, tol: float = 1e-6) -> bool:
+        if np.any(x < lower - tol) or np.any(x > upper + tol):
+            return False
+        for row, lb, ub in zip(hard_rows, hard_lb, hard_ub):
+            if not lb - tol <= row @ x <= ub + tol:
+                return False
+        return all(row_a @ x >= rhs_a - tol or row_b @ x <= rhs_b + tol
+                   for row_a, rhs_a, row_b, rhs_b in disjunctions)
+
+    @staticmethod
+    def _build_path(train, profile, x, reference, n, d_idx, r_idx, w_idx,
+                    warm_start: Optional[TrainPath]) -> TrainPath:
+        schedule, speeds = [], []
+        offset = x[d_idx]
+        for i in range(n):
+            dwell = float(x[w_idx + i]) if profile.has_platforms[i] else 0.0
+            schedule.append((profile.section_ids[i], reference + timedelta(minutes=float(offset)), dwell))
+            speeds.append(profile.max_speeds[i] * profile.base_running_times[i] / float(x[r_idx + i]))
+            offset += x[r_idx + i] + dwell
+        platforms = (list(warm_start.platforms) if warm_start is not None
+                     else [p[0] if p else "" for p in profile.platforms])
+        return TrainPath(train, schedule, speeds, platforms)
+
+
+def _row_range(row: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> Tuple[float, float]:
+    """Smallest and largest value of row @ x over the variable bounds"""
+    positive = np.maximum(row, 0)
+    negative = np.minimum(row, 0)
+    return float(positive @ lower + negative @ upper), float(positive @ upper + negative @ lower)
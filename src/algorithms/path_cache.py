@@ -0,0 +1,138 @@
+from typing import Any, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+import re
+from ..models.core.train import TrainPath, TrainService
+from ..models.core.infrastructure import Infrastructure
+
+
+# timetable_version() names: 16-byte blake2b hex digests
+_VERSION_NAME = re.compile(r"[0-9a-f]{32}")
+
+
+def _digest(*parts: Any) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(repr(part).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def timetable_version(existing_paths: Iterable[TrainPath], infrastructure: Infrastructure) -> str:
+    """Content hash of the timetable and infrastructure a search runs against.
+
+    Timetables that carry their own ``version`` (e.g. snapshots) are not rehashed.
+    """
+    paths_version = getattr(existing_paths, "version", None)
+    if paths_version is None:
+        paths_version = _digest(*((path.train.id, path.schedule, path.speeds, path.platforms)
+                                  for path in existing_paths))
+    return _digest(paths_version, infrastructure.version)
+
+
+class PathResultCache:
+    """Memoises find_best_path results.
+
+    Keys combine the train parameters, departure window and engine settings;
+    every entry is stored under its timetable version, so results for several
+    timetables (e.g. interleaved what-if snapshots) live side by side. The
+    in-memory tier is an LRU bounded by ``max_entries``; with ``disk_dir`` set,
+    results are also written to one pickle per key under a per-version
+    subdirectory. Lookups never delete anything, so processes may share a
+    ``disk_dir``. Cached paths are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 1024, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+        self._disk_versions = set()  # version subdirectories written by this cache
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[TrainPath], List[TrainPath]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(train: TrainService,
+                 departure_window: Tuple[Any, Any],
+                 settings: Tuple[Any, ...]) -> str:
+        return _digest(train, departure_window, settings)
+
+    def _disk_path(self, key: str, version: str) -> str:
+        return os.path.join(self.disk_dir, version, f"{key}.pkl")
+
+    def get(self, key: str, version: str) -> Optional[Tuple[Optional[TrainPath], List[TrainPath]]]:
+        result = self._entries.get((version, key))
+        if result is not None:
+            self._entries.move_to_end((version, key))
+        elif self.disk_dir and os.path.exists(self._disk_path(key, version)):
+            with open(self._disk_path(key, version), "rb") as f:
+                result = pickle.load(f)
+            self._remember(key, version, result)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        best_path, alternatives = result
+        return best_path, list(alternatives)
+
+    def put(self, key: str, version: str, result: Tuple[Optional[TrainPath], List[TrainPath]]):
+        best_path, alternatives = result
+        result = (best_path, list(alternatives))
+        self._remember(key, version, result)
+        if self.disk_dir:
+            os.makedirs(os.path.join(self.disk_dir, version), exist_ok=True)
+            self._disk_versions.add(version)
+            # Unique temporary name so concurrent writers of the same key do not collide
+            tmp_path = f"{self._disk_path(key, version)}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key, version))
+
+    def _remember(self, key: str, version: str, result):
+        self._entries[(version, key)] = result
+        self._entries.move_to_end((version, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _is_version_dir(self, name: str) -> bool:
+        return name in self._disk_versions or _VERSION_NAME.fullmatch(name) is not None
+
+    def _clear_disk(self, version: str):
+        """Delete the cache's pickles (and stray temporaries) of ``version``; other files stay"""
+        directory = os.path.join(self.disk_dir, version)
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            if name.endswith(".pkl") or name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+        try:
+            os.rmdir(directory)  # only succeeds once nothing foreign is left in it
+        except OSError:
+            pass
+        self._disk_versions.discard(version)
+
+    def clear(self, version: Optional[str] = None):
+        """Drop the entries of ``version``, or every entry, from memory and disk.
+
+        On disk only cache entries are removed: without a version that means the
+        version subdirectories this cache wrote or whose names are timetable
+        version digests. Anything else under ``disk_dir`` is left alone.
+        """
+        if version is None:
+            self._entries.clear()
+            if self.disk_dir and os.path.isdir(self.disk_dir):
+                for name in os.listdir(self.disk_dir):
+                    if self._is_version_dir(name):
+                        self._clear_disk(name)
+            return
+        for entry in [entry for entry in self._entries if entry[0] == version]:
+            del self._entries[entry]
+        if self.disk_dir:
+            self._clear_disk(version)
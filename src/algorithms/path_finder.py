@@ -1,166 +1,542 @@
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Hashable, Iterator, NamedTuple, Optional, Tuple, Union
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import random
+import time
 from ..models.core.train import TrainPath, TrainService
-from ..models.core.infrastructure import Infrastructure, Direction
-from .conflict_checker import ConflictChecker
+from ..models.core.infrastructure import Infrastructure, Direction, DIRECTION_CODES
+from .conflict_checker import ConflictChecker, ScheduleColumns
+from .path_selection import TopKPaths, ParetoFront, path_total_dwell
+from .path_cache import PathResultCache, timetable_version
+from .time_windows import (OccupancyTable, free_intervals, sample_in_intervals,
+                           sample_grid_in_intervals, to_datetimes)
 from ..models.ml.path_success_predictor import PathSuccessPredictor
 from ..models.ml.congestion_analyzer import CongestionAnalyzer
 import numpy as np
 
+@dataclass
+class SearchStats:
+    """Counters collected while searching for paths"""
+    attempts: int = 0
+    feasible: int = 0
+    rejected_crossing: int = 0
+    rejected_conflict: int = 0
+    no_free_window: int = 0
+    duplicates: int = 0
+    memo_hits: int = 0
+    improvements: int = 0
+    elapsed: float = 0.0  # wall-clock seconds
+    deadline_reached: bool = False
+    cache_hit: bool = False
+
+class RouteProfile(NamedTuple):
+    """Per-train constants of a route, precomputed once per search"""
+    section_ids: List[str]
+    sections: List[int]
+    bases: List[int]
+    base_running_times: List[float]  # minutes at full speed
+    max_speeds: List[float]
+    has_platforms: List[bool]
+    platforms: List[List[str]]
+
+_SIGNATURE_EPOCH = datetime(2000, 1, 1)
+_MIN_SPEED_FACTOR = 0.6  # slowest sampled fraction of the maximum speed
+
+
+def _grid_minutes(time: datetime) -> float:
+    return (time - _SIGNATURE_EPOCH).total_seconds() / 60
+
+
+def _grid_time(index: int, resolution_seconds: float) -> datetime:
+    """Exact datetime of a grid point, so equal indices give equal times"""
+    return _SIGNATURE_EPOCH + timedelta(seconds=index * resolution_seconds)
+
+
+def _snap(value: float, step: float, low: float, high: float) -> float:
+    """Nearest multiple of ``step`` within [low, high], or ``value`` if there is none"""
+    first, last = np.ceil(low / step - 1e-9), np.floor(high / step + 1e-9)
+    if first > last:
+        return value
+    return float(min(max(round(value / step), first), last) * step)
+
+
 class PathFinder:
     def __init__(self, 
                  infrastructure,
                  success_predictor,
-                 congestion_analyzer):
+                 congestion_analyzer,
+                 verbose: bool = True,
+                 cache: Optional[PathResultCache] = None,
+                 departure_window_minutes: float = 120.0,
+                 signature_resolution_seconds: Optional[float] = 30.0,
+                 feasibility_memo_size: int = 100_000):
         self.infrastructure = infrastructure
         self.success_predictor = success_predictor
         self.congestion_analyzer = congestion_analyzer
-        self.conflict_checker = ConflictChecker()
+        self.verbose = verbose
+        self.cache = cache
+        self.departure_window_minutes = departure_window_minutes
+        self.signature_resolution_seconds = signature_resolution_seconds
+        self.feasibility_memo_size = feasibility_memo_size
+        # (timetable version, headway, signature) -> (rejection reason, "" when feasible;
+        # last search that drew it), bounded by feasibility_memo_size
+        self._feasibility_memo: "OrderedDict[Hashable, Tuple[str, int]]" = OrderedDict()
+        self._search_count = 0
+        self.conflict_checker = ConflictChecker(verbose=verbose)
+        self._snapshot_columns: Optional[Tuple[str, ScheduleColumns]] = None
+        self.last_search_stats: Optional[SearchStats] = None
+
+    def _schedule_columns(self, existing_paths: Union[List[TrainPath], ScheduleColumns]) -> ScheduleColumns:
+        """Integer columns of the existing paths coded by the infrastructure section index.
+
+        Built once per search and shared by both checks; snapshots keep theirs
+        while their version is unchanged.
+        """
+        if isinstance(existing_paths, ScheduleColumns):
+            return existing_paths
+        version = getattr(existing_paths, "version", None)
+        if version is not None and self._snapshot_columns is not None and self._snapshot_columns[0] == version:
+            return self._snapshot_columns[1]
+        columns = ScheduleColumns(existing_paths, self.infrastructure.section_index)
+        columns.base = np.where(columns.valid, self.infrastructure.base_sections[columns.section], -1)
+        if version is not None:
+            self._snapshot_columns = (version, columns)
+        return columns
 
-    def _is_path_crossing(self, new_path: TrainPath, existing_paths: List[TrainPath]) -> bool:
+    def _is_path_crossing(self, new_path: TrainPath,
+                          existing_paths: Union[List[TrainPath], ScheduleColumns]) -> bool:
         """Check if the new path crosses any existing paths in the opposite direction"""
-        print(f"\nChecking path crossing for train {new_path.train.id}")
-        for existing_path in existing_paths:
-            if new_path.train.direction != existing_path.train.direction:
-                new_times = [t for _, t, _ in new_path.schedule]
-                new_sections = [s.split('_')[0] for s, _, _ in new_path.schedule]
-                
-                existing_times = [t for _, t, _ in existing_path.schedule]
-                existing_sections = [s.split('_')[0] for s, _, _ in existing_path.schedule]
-                
-                print(f"Comparing with {existing_path.train.id}:")
-                print(f"New path sections: {new_sections}")
-                print(f"Existing path sections: {existing_sections}")
-                
-                for i in range(len(new_sections) - 1):
-                    for j in range(len(existing_sections) - 1):
-                        if (new_sections[i] == existing_sections[j]):
-                            if (min(new_times[i+1], existing_times[j+1]) > 
-                                max(new_times[i], existing_times[j])):
-                                print(f"Found crossing at section {new_sections[i]}")
-                                return True
+        if self.verbose:
+            print(f"\nChecking path crossing for train {new_path.train.id}")
+        columns = self._schedule_columns(existing_paths)
+        if len(new_path.schedule) < 2 or columns.width < 2:
+            return False
+        _, new_times, _ = columns.encode(new_path)
+        section_base = self.infrastructure.section_base
+        new_sections = np.array([section_base[s] for s, _, _ in new_path.schedule])
+        opposite = columns.direction != DIRECTION_CODES[new_path.train.direction]
+
+        if self.verbose:
+            base_ids = self.infrastructure.base_ids
+            for row in np.flatnonzero(opposite):
+                existing_sections = columns.base[row][columns.valid[row]]
+                print(f"Comparing with {columns.paths[row].train.id}:")
+                print(f"New path sections: {[base_ids[b] for b in new_sections]}")
+                print(f"Existing path sections: {[base_ids[b] for b in existing_sections]}")
+
+        # Entry j of an existing path spans [start[j], start[j+1]) on base[j]
+        existing_sections = columns.base[:, :-1]
+        existing_starts, existing_ends = columns.start[:, :-1], columns.start[:, 1:]
+        followed = opposite[:, None] & columns.valid[:, 1:]
+        for i in range(len(new_sections) - 1):
+            crossing = (followed & (existing_sections == new_sections[i]) &
+                        (np.minimum(new_times[i + 1], existing_ends) >
+                         np.maximum(new_times[i], existing_starts)))
+            if crossing.any():
+                if self.verbose:
+                    print(f"Found crossing at section "
+                          f"{self.infrastructure.base_ids[new_sections[i]]}")
+                return True
         return False
 
     def _find_time_windows(self, 
                       existing_paths: List[TrainPath], 
-                      direction: Direction,
-                      target_start_time: datetime) -> List[Tuple[datetime, datetime]]:
-        """Find potential start times for new train"""
-        # Just return a single window around the target start time
-        return [(target_start_time, target_start_time + timedelta(minutes=1))]
+                      train: TrainService,
+                      target_start_time: datetime,
+                      window_end: Optional[datetime] = None,
+                      speed_factor: float = 1.0,
+                      dwell_times: Optional[List[float]] = None) -> List[Tuple[datetime, datetime]]:
+        """Find the departure intervals in which the train runs free of existing paths.
 
-    def generate_all_feasible_paths(self, 
-                              train: TrainService,
-                              start_time: datetime,
-                              existing_paths: List[TrainPath],
-                              max_paths: int = 50) -> List[TrainPath]:  # Increased max paths
-        """Generate feasible paths with varying speeds and dwell times"""
-        print(f"\nGenerating feasible paths for train {train.id} - Direction: {train.direction.value}")
+        The train's section entries are offset from its departure by cumulative
+        running and dwell time (full speed and minimum dwell by default). Every
+        occupancy of a shared section is shifted back by that offset into a blocked
+        departure interval, and the free intervals are what remains of
+        [target_start_time, window_end] (end of day by default).
+        """
+        if window_end is None:
+            window_end = target_start_time.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        profile = self._route_profile(train)
+        if dwell_times is None:
+            dwell_times = [train.min_dwell_time] * len(profile.section_ids)
+        offsets, dwells = self._route_offsets(profile, speed_factor, dwell_times)
+        occupancy = self._occupancy_table(existing_paths, target_start_time, target_start_time,
+                                          window_end, offsets[-1] + dwells[-1])
+        free = self._free_departures(occupancy, train, profile, offsets, dwells,
+                                     0.0, (window_end - target_start_time).total_seconds() / 60)
+        return to_datetimes(free, target_start_time)
+
+    def _occupancy_table(self,
+                         existing_paths: List[TrainPath],
+                         reference: datetime,
+                         window_start: datetime,
+                         window_end: datetime,
+                         journey_minutes: float) -> OccupancyTable:
+        """Occupancies that can interact with a departure in the window and a journey of at most ``journey_minutes``"""
+        headway = self.conflict_checker.min_headway
+        return OccupancyTable(existing_paths, self.infrastructure, reference,
+                              window_start - headway,
+                              window_end + timedelta(minutes=journey_minutes) + headway)
+
+    def _free_departures(self,
+                         occupancy: OccupancyTable,
+                         train: TrainService,
+                         profile: 'RouteProfile',
+                         offsets: List[float],
+                         dwells: List[float],
+                         lower: float,
+                         upper: float) -> np.ndarray:
+        """Free departure intervals, in minutes from ``occupancy.reference``"""
+        blocked = occupancy.blocked_departures(
+            profile.sections, profile.bases, offsets, dwells, train.direction,
+            self.conflict_checker.min_headway.total_seconds() / 60
+        )
+        return free_intervals(blocked, lower, upper)
+
+    def _path_objectives(self, path: TrainPath) -> Tuple[float, ...]:
+        """Objectives for multi-criteria selection: journey time, total dwell and, with a
+        success predictor, failure probability"""
+        objectives = (path.calculate_journey_time(), path_total_dwell(path))
+        if self.success_predictor is None:
+            return objectives
+        return objectives + (-self.success_predictor.predict_success_probability(path),)
+
+    def _departure_window(self, start_time: datetime) -> Tuple[datetime, datetime]:
+        """Interval the departure time is sampled from"""
+        return start_time, start_time + timedelta(minutes=self.departure_window_minutes)
+
+    def _route_profile(self, train: TrainService) -> RouteProfile:
+        """Look up the train's route and its per-section constants in the infrastructure arrays"""
+        infra = self.infrastructure
+        route = infra.route(train.direction)
+        max_speeds = np.minimum(train.max_speed, infra.max_speeds[route])
+        return RouteProfile(
+            section_ids=[infra.section_ids[i] for i in route],
+            sections=route.tolist(),
+            bases=infra.base_sections[route].tolist(),
+            base_running_times=(infra.lengths[route] / max_speeds * 60).tolist(),
+            max_speeds=max_speeds.tolist(),
+            has_platforms=infra.has_platforms[route].tolist(),
+            platforms=[infra.sections[infra.section_ids[i]].platforms or [] for i in route]
+        )
+
+    @staticmethod
+    def _route_offsets(profile: RouteProfile,
+                       speed_factor: float,
+                       dwell_times: List[float]) -> Tuple[List[float], List[float]]:
+        """Entry offsets from departure and effective dwell per route section, in minutes"""
+        offsets, dwells = [], []
+        offset = 0.0
+        for idx, base_running_time in enumerate(profile.base_running_times):
+            dwell_time = dwell_times[idx] if profile.has_platforms[idx] else 0.0
+            offsets.append(offset)
+            dwells.append(dwell_time)
+            offset += base_running_time / speed_factor + dwell_time
+        return offsets, dwells
+
+    def _sample_candidate(self,
+                          train: TrainService,
+                          start_time: datetime,
+                          profile: Optional[RouteProfile] = None,
+                          occupancy: Optional[OccupancyTable] = None) -> Optional[TrainPath]:
+        """Build one random candidate path with varying speed, dwell and departure.
+
+        Without ``occupancy`` the departure is drawn blindly from the departure
+        window. With it, the departure is drawn only from the free intervals for
+        the sampled speed and dwells; None is returned if there are none. With a
+        signature resolution, the departure and dwells are snapped to that grid
+        and the speed factor to the one giving a grid-multiple running time, so
+        candidates in the same slot have identical schedules.
+        """
+        if profile is None:
+            profile = self._route_profile(train)
+        step = self.signature_resolution_seconds / 60 if self.signature_resolution_seconds else None
         
-        feasible_paths = []
-        attempts = 0
-        max_attempts = 200  # Increased attempts
-
-        direction_suffix = "_UP" if train.direction == Direction.UP else "_DOWN"
-        section_order = (["SEC1", "SEC2", "SEC3"] if train.direction == Direction.UP 
-                        else ["SEC3", "SEC2", "SEC1"])
-
-        while attempts < max_attempts and len(feasible_paths) < max_paths:
-            # Random departure time between 7:20 and 7:25
-            minutes_offset = random.uniform(0, 5)
-            departure_time = start_time.replace(hour=7, minute=20) + timedelta(minutes=minutes_offset)
-            
-            schedule = []
-            platforms = []
-            current_time = departure_time
-            
-            # Generate random speed factor (0.6 to 1.0 of max speed)
-            speed_factor = random.uniform(0.6, 1.0)
-            
-            # Generate different dwell times for each section
-            dwell_times = [
-                random.uniform(train.min_dwell_time, train.max_dwell_time * 1.5)
-                for _ in range(3)
-            ]
-            
-            print(f"\nAttempt {attempts + 1}")
+        # Generate random speed factor (0.6 to 1.0 of max speed)
+        speed_factor = random.uniform(_MIN_SPEED_FACTOR, 1.0)
+        
+        # Generate different dwell times for each section
+        dwell_times = [
+            random.uniform(train.min_dwell_time, train.max_dwell_time * 1.5)
+            for _ in profile.section_ids
+        ]
+        if step is not None:
+            full_speed_time = sum(profile.base_running_times)
+            running_time = _snap(full_speed_time / speed_factor, step,
+                                 full_speed_time, full_speed_time / _MIN_SPEED_FACTOR)
+            speed_factor = full_speed_time / running_time
+            dwell_times = [_snap(dwell, step, train.min_dwell_time, train.max_dwell_time * 1.5)
+                           for dwell in dwell_times]
+        offsets, dwells = self._route_offsets(profile, speed_factor, dwell_times)
+
+        # Random departure time inside the departure window
+        window_start, window_end = self._departure_window(start_time)
+        if occupancy is None:
+            if step is None:
+                departure_time = window_start + (window_end - window_start) * random.random()
+            else:
+                grid = np.array([[_grid_minutes(window_start) - 1e-9, _grid_minutes(window_end) + 1e-9]])
+                departure_time = _grid_time(sample_grid_in_intervals(grid, step, random.random()),
+                                            self.signature_resolution_seconds)
+        else:
+            free = self._free_departures(occupancy, train, profile, offsets, dwells,
+                                         (window_start - occupancy.reference).total_seconds() / 60,
+                                         (window_end - occupancy.reference).total_seconds() / 60)
+            index = None
+            if len(free) and step is not None:
+                index = sample_grid_in_intervals(free + _grid_minutes(occupancy.reference), step,
+                                                 random.random())
+            if not len(free) or (step is not None and index is None):
+                if self.verbose:
+                    print(f"No free departure for speed factor {speed_factor:.2f}")
+                return None
+            if step is None:
+                departure_time = occupancy.reference + timedelta(
+                    minutes=sample_in_intervals(free, random.random()))
+            else:
+                departure_time = _grid_time(index, self.signature_resolution_seconds)
+        
+        if self.verbose:
             print(f"Departure: {departure_time.strftime('%H:%M:%S')}")
             print(f"Speed factor: {speed_factor:.2f}")
             print(f"Dwell times: {[f'{t:.1f}' for t in dwell_times]} minutes")
+        
+        schedule = []
+        platforms = []
+        speeds = [max_speed * speed_factor for max_speed in profile.max_speeds]
+        for idx, section_id in enumerate(profile.section_ids):
+            entry_time = departure_time + timedelta(minutes=offsets[idx])
+            schedule.append((section_id, entry_time, dwells[idx]))
+            platforms.append(random.choice(profile.platforms[idx]) if profile.has_platforms[idx] else "")
             
-            for idx, section_id in enumerate([f"{sec}{direction_suffix}" for sec in section_order]):
-                section = self.infrastructure.sections[section_id]
+            if self.verbose:
+                exit_offset = offsets[idx] + profile.base_running_times[idx] / speed_factor + dwells[idx]
+                print(f"  {section_id}: {entry_time.strftime('%H:%M:%S')} -> "
+                    f"{(departure_time + timedelta(minutes=exit_offset)).strftime('%H:%M:%S')} "
+                    f"(Speed: {speeds[idx]:.1f} km/h, Dwell: {dwells[idx]:.1f} min)")
+        
+        return TrainPath(train, schedule, speeds, platforms)
+
+    def _signature(self, path: TrainPath) -> Hashable:
+        """Direction plus section entry times and dwells.
+
+        Candidates are snapped to the signature resolution when sampled, so
+        every candidate in the same slot has exactly this signature and a
+        memoised result applies to it unchanged.
+        """
+        return (path.train.direction,) + tuple(path.schedule)
+
+    def _rejection_reason(self, candidate_path: TrainPath,
+                          existing_paths: Union[List[TrainPath], ScheduleColumns]) -> str:
+        existing_paths = self._schedule_columns(existing_paths)
+        if self._is_path_crossing(candidate_path, existing_paths):
+            return "crossing"
+        if self.conflict_checker.check_conflicts(candidate_path, existing_paths):
+            return "conflict"
+        return ""
+
+    def _search(self,
+                train: TrainService,
+                start_time: datetime,
+                existing_paths: List[TrainPath],
+                max_attempts: Optional[int],
+                deadline: Optional[float],
+                stats: SearchStats) -> Iterator[TrainPath]:
+        """Yield every feasible candidate until the attempt or time budget is spent"""
+        if max_attempts is None and deadline is None:
+            raise ValueError("Either max_attempts or deadline must be set")
+        started = time.monotonic()
+        stop_at = started + deadline if deadline is not None else None
+        profile = self._route_profile(train)
+        window_start, window_end = self._departure_window(start_time)
+        slowest, dwells = self._route_offsets(profile, _MIN_SPEED_FACTOR,
+                                              [train.max_dwell_time * 1.5] * len(profile.section_ids))
+        occupancy = self._occupancy_table(existing_paths, start_time, window_start, window_end,
+                                          slowest[-1] + dwells[-1])
+        columns = self._schedule_columns(existing_paths)
+        dedupe = bool(self.signature_resolution_seconds)
+        memo = self._feasibility_memo if dedupe else None
+        # Entries are scoped by timetable version and headway, so searches on different
+        # snapshots (even interleaved ones) never reuse each other's results
+        scope = ((timetable_version(existing_paths, self.infrastructure), self.conflict_checker.min_headway)
+                 if dedupe else None)
+        # Signatures drawn by this search are the memo entries tagged with its number,
+        # so duplicate detection shares the memo's size bound
+        self._search_count += 1
+        search_number = self._search_count
+
+        try:
+            while max_attempts is None or stats.attempts < max_attempts:
+                if stop_at is not None and time.monotonic() >= stop_at:
+                    stats.deadline_reached = True
+                    break
                 
-                # Variable speed for each section
-                max_speed = min(train.max_speed, section.max_speed)
-                actual_speed = max_speed * speed_factor
-                running_time = (section.length / actual_speed) * 60
+                if self.verbose:
+                    print(f"\nAttempt {stats.attempts + 1}")
+                candidate_path = self._sample_candidate(train, start_time, profile, occupancy)
+                stats.attempts += 1
                 
-                dwell_time = dwell_times[idx] if section.has_platforms else 0.0
+                if candidate_path is None:
+                    stats.no_free_window += 1
+                    continue
                 
-                schedule.append((section_id, current_time, dwell_time))
-                platforms.append(random.choice(section.platforms) if section.has_platforms else "")
+                signature = None
+                reason = None
+                if dedupe:
+                    signature = scope + (self._signature(candidate_path),)
+                    entry = memo.get(signature)
+                    if entry is not None:
+                        if entry[1] == search_number:
+                            stats.duplicates += 1
+                            if self.verbose:
+                                print("  Duplicate of an earlier candidate")
+                            continue
+                        reason = entry[0]
+                        stats.memo_hits += 1
+                        memo[signature] = (reason, search_number)
+                        memo.move_to_end(signature)
                 
-                current_time += timedelta(minutes=running_time + dwell_time)
-                print(f"  {section_id}: {schedule[-1][1].strftime('%H:%M:%S')} -> "
-                    f"{current_time.strftime('%H:%M:%S')} "
-                    f"(Speed: {actual_speed:.1f} km/h, Dwell: {dwell_time:.1f} min)")
-            
-            speeds = [min(train.max_speed, self.infrastructure.sections[s].max_speed) * speed_factor 
-                    for s, _, _ in schedule]
-            
-            candidate_path = TrainPath(train, schedule, speeds, platforms)
-            
-            if (not self._is_path_crossing(candidate_path, existing_paths) and 
-                not self.conflict_checker.check_conflicts(candidate_path, existing_paths)):
-                journey_time = candidate_path.calculate_journey_time()
+                if reason is None:
+                    reason = self._rejection_reason(candidate_path, columns)
+                    if memo is not None:
+                        memo[signature] = (reason, search_number)
+                        if len(memo) > self.feasibility_memo_size:
+                            memo.popitem(last=False)
+                
+                if reason == "crossing":
+                    stats.rejected_crossing += 1
+                elif reason == "conflict":
+                    stats.rejected_conflict += 1
+                else:
+                    stats.feasible += 1
+                    stats.elapsed = time.monotonic() - started
+                    yield candidate_path
+                    continue
+                if self.verbose:
+                    print("  Path has conflicts")
+        finally:
+            stats.elapsed = time.monotonic() - started
+
+    def iter_feasible_paths(self,
+                            train: TrainService,
+                            start_time: datetime,
+                            existing_paths: List[TrainPath],
+                            max_attempts: Optional[int] = 200,
+                            deadline: Optional[float] = None,
+                            stats: Optional[SearchStats] = None) -> Iterator[TrainPath]:
+        """Anytime search: yield each feasible path that beats the best journey time so far.
+
+        ``deadline`` is a wall-clock budget in seconds; with ``max_attempts=None`` the
+        search runs until the deadline. Pass a ``SearchStats`` to follow progress
+        while iterating; it is also stored as ``last_search_stats``.
+        """
+        stats = stats if stats is not None else SearchStats()
+        self.last_search_stats = stats
+        best_time = None
+        
+        for path in self._search(train, start_time, existing_paths, max_attempts, deadline, stats):
+            journey_time = path.calculate_journey_time()
+            if best_time is None or journey_time < best_time:
+                best_time = journey_time
+                stats.improvements += 1
+                yield path
+
+    def generate_all_feasible_paths(self, 
+                              train: TrainService,
+                              start_time: datetime,
+                              existing_paths: List[TrainPath],
+                              max_paths: int = 50,
+                              max_attempts: Optional[int] = 200,
+                              pareto: bool = False,
+                              deadline: Optional[float] = None) -> List[TrainPath]:
+        """Generate feasible paths with varying speeds and dwell times.
+
+        Candidates are streamed into a bounded top-k heap on journey time, so at most
+        ``max_paths`` paths are held regardless of ``max_attempts``. With ``pareto=True``
+        the non-dominated front over journey time, total dwell and (with a success
+        predictor) predicted success probability is kept instead, capped at ``max_paths`` members. ``deadline`` bounds
+        the search in wall-clock seconds; statistics end up in ``last_search_stats``.
+        """
+        if self.verbose:
+            print(f"\nGenerating feasible paths for train {train.id} - Direction: {train.direction.value}")
+        
+        selector = (ParetoFront(self._path_objectives, capacity=max_paths) if pareto
+                    else TopKPaths(max_paths))
+        stats = SearchStats()
+        self.last_search_stats = stats
+        best_time = None
+
+        for candidate_path in self._search(train, start_time, existing_paths,
+                                           max_attempts, deadline, stats):
+            journey_time = candidate_path.calculate_journey_time()
+            if self.verbose:
                 print(f"\nFound valid path!")
                 print(f"Total journey time: {journey_time:.1f} minutes")
-                print(f"Average speed: {np.mean(speeds):.1f} km/h")
-                print(f"Total dwell time: {sum(dwell_times):.1f} minutes")
-                feasible_paths.append(candidate_path)
+                print(f"Average speed: {np.mean(candidate_path.speeds):.1f} km/h")
+                print(f"Total dwell time: {path_total_dwell(candidate_path):.1f} minutes")
+            if pareto:
+                selector.push(candidate_path)
             else:
-                print("  Path has conflicts")
-            
-            attempts += 1
+                selector.push(candidate_path, journey_time)
+            if best_time is None or journey_time < best_time:
+                best_time = journey_time
+                stats.improvements += 1
         
-        print(f"\nGenerated {len(feasible_paths)} valid paths out of {attempts} attempts")
+        feasible_paths = selector.paths()
         
-        # Sort paths by journey time
-        feasible_paths.sort(key=lambda p: p.calculate_journey_time())
-        
-        print("\nFeasible paths summary:")
-        for i, path in enumerate(feasible_paths, 1):
-            journey_time = path.calculate_journey_time()
-            total_dwell = sum(dwell for _, _, dwell in path.schedule)
-            avg_speed = np.mean([min(train.max_speed, self.infrastructure.sections[s].max_speed) * speed_factor 
-                            for s, _, _ in path.schedule])
-            print(f"Path {i}:")
-            print(f"  Departure: {path.schedule[0][1].strftime('%H:%M:%S')}")
-            print(f"  Journey time: {journey_time:.1f} minutes")
-            print(f"  Total dwell: {total_dwell:.1f} minutes")
-            print(f"  Average speed: {avg_speed:.1f} km/h")
+        if self.verbose:
+            print(f"\nGenerated {stats.feasible} valid paths out of {stats.attempts} attempts "
+                  f"in {stats.elapsed * 1000:.0f} ms, keeping {len(selector)}"
+                  + (" (deadline reached)" if stats.deadline_reached else ""))
+            print("\nFeasible paths summary:")
+            for i, path in enumerate(feasible_paths, 1):
+                print(f"Path {i}:")
+                print(f"  Departure: {path.schedule[0][1].strftime('%H:%M:%S')}")
+                print(f"  Journey time: {path.calculate_journey_time():.1f} minutes")
+                print(f"  Total dwell: {path_total_dwell(path):.1f} minutes")
+                print(f"  Average speed: {np.mean(path.speeds):.1f} km/h")
         
         return feasible_paths
 
     def find_best_path(self, 
                       train: TrainService,
                       start_time: datetime,
-                      existing_paths: List[TrainPath]) -> Tuple[TrainPath, List[TrainPath]]:
-        """Find best path and return all feasible alternatives"""
-        feasible_paths = self.generate_all_feasible_paths(train, start_time, existing_paths)
-        
-        if not feasible_paths:
-            return None, []
+                      existing_paths: List[TrainPath],
+                      pareto: bool = False,
+                      deadline: Optional[float] = None,
+                      max_attempts: Optional[int] = 200) -> Tuple[TrainPath, List[TrainPath]]:
+        """Find best path and return all feasible alternatives.
+
+        Paths come back from ``generate_all_feasible_paths`` already ranked, so the
+        best one is simply the first. With ``pareto=True`` the alternatives are the
+        rest of the Pareto front and the best path is its fastest member. With
+        ``deadline`` (seconds) the best path found within that budget is returned;
+        pass ``max_attempts=None`` to search until the deadline.
+
+        When the finder has a ``cache``, results are memoised per train, departure
+        window, search settings, predictor version and timetable version.
+        """
+        if self.cache is not None:
+            version = timetable_version(existing_paths, self.infrastructure)
+            key = self.cache.make_key(
+                train,
+                self._departure_window(start_time),
+                (pareto, deadline, max_attempts, self.conflict_checker.min_headway,
+                 self.departure_window_minutes, self.signature_resolution_seconds,
+                 getattr(self.success_predictor, "version", None))
+            )
+            cached = self.cache.get(key, version)
+            if cached is not None:
+                self.last_search_stats = SearchStats(cache_hit=True)
+                return cached
         
-        # Sort paths by journey time
-        sorted_paths = sorted(feasible_paths, key=lambda p: p.calculate_journey_time())
-        print("\nFeasible paths found (sorted by journey time):")
-        for i, path in enumerate(sorted_paths, 1):
-            journey_time = path.calculate_journey_time()
-            dwell_time = sum(dwell for _, _, dwell in path.schedule)
-            print(f"Path {i}: Journey time = {journey_time:.1f} min, "
-                  f"Total dwell = {dwell_time:.1f} min")
+        feasible_paths = self.generate_all_feasible_paths(train, start_time, existing_paths,
+                                                          max_attempts=max_attempts,
+                                                          pareto=pareto,
+                                                          deadline=deadline)
         
-        return sorted_paths[0], sorted_paths[1:]
\ No newline at end of file
+        result = (feasible_paths[0], feasible_paths[1:]) if feasible_paths else (None, [])
+        if self.cache is not None:
+            self.cache.put(key, version, result)
+        return result
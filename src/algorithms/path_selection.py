@@ -0,0 +1,121 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+import bisect
+import heapq
+import itertools
+import numpy as np
+from ..models.core.train import TrainPath
+
+
+def path_total_dwell(path: TrainPath) -> float:
+    """Total dwell time of a path in minutes"""
+    return sum(dwell for _, _, dwell in path.schedule)
+
+
+class TopKPaths:
+    """Keep the k best paths of a stream, scored by a single objective (lower is better).
+
+    Candidates are pushed one at a time and memory never grows beyond k entries.
+    Each path is scored exactly once, on push.
+    """
+
+    def __init__(self, k: int, key: Optional[Callable[[TrainPath], float]] = None):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.key = key or (lambda p: p.calculate_journey_time())
+        # Max-heap on score via negation; ties are broken in favour of the earlier path
+        self._heap: List[Tuple[float, int, TrainPath]] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def worst_score(self) -> Optional[float]:
+        """Score a new candidate has to beat once the heap is full"""
+        return -self._heap[0][0] if self._heap else None
+
+    def push(self, path: TrainPath, score: Optional[float] = None) -> bool:
+        """Offer a path; return True if it was kept"""
+        if score is None:
+            score = self.key(path)
+        entry = (-score, -next(self._counter), path)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def items(self) -> List[Tuple[float, TrainPath]]:
+        """(score, path) pairs sorted from best to worst"""
+        return [(-neg_score, path) for neg_score, _, path in sorted(self._heap, reverse=True)]
+
+    def paths(self) -> List[TrainPath]:
+        return [path for _, path in self.items()]
+
+
+class ParetoFront:
+    """Non-dominated set of paths over several objectives (all minimised).
+
+    Members are kept in lexicographic order of their objective vectors, so a
+    candidate can only be dominated by members sorted before it and can only
+    dominate members sorted after it. Both checks are vectorised over the front.
+    When ``capacity`` is set, the members with the worst first objective are
+    dropped to keep memory bounded.
+    """
+
+    def __init__(self,
+                 objectives: Callable[[TrainPath], Sequence[float]],
+                 capacity: Optional[int] = None):
+        self.objectives = objectives
+        self.capacity = capacity
+        self._keys: List[Tuple[float, ...]] = []
+        self._values = np.empty((0, 0))
+        self._paths: List[TrainPath] = []
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def push(self, path: TrainPath, values: Optional[Sequence[float]] = None) -> bool:
+        """Offer a path; return True if it joined the front"""
+        key = tuple(float(v) for v in (values if values is not None else self.objectives(path)))
+        point = np.asarray(key)
+        pos = bisect.bisect_right(self._keys, key)
+
+        # Dominated (or duplicated) by an existing member
+        if pos and np.any(np.all(self._values[:pos] <= point, axis=1)):
+            return False
+
+        # Drop members the candidate dominates
+        if pos < len(self._keys):
+            tail = self._values[pos:]
+            keep = ~np.all(point <= tail, axis=1)
+            if not keep.all():
+                keep_idx = np.flatnonzero(keep) + pos
+                self._keys = self._keys[:pos] + [self._keys[i] for i in keep_idx]
+                self._paths = self._paths[:pos] + [self._paths[i] for i in keep_idx]
+                self._values = np.vstack([self._values[:pos], self._values[keep_idx]])
+
+        self._keys.insert(pos, key)
+        self._paths.insert(pos, path)
+        if self._values.size:
+            self._values = np.insert(self._values, pos, point, axis=0)
+        else:
+            self._values = point.reshape(1, -1)
+
+        if self.capacity is not None and len(self._paths) > self.capacity:
+            evicted = self._paths[-1]
+            del self._keys[-1]
+            del self._paths[-1]
+            self._values = self._values[:-1]
+            return evicted is not path
+        return True
+
+    def items(self) -> List[Tuple[Tuple[float, ...], TrainPath]]:
+        """(objectives, path) pairs sorted lexicographically by objectives"""
+        return list(zip(self._keys, self._paths))
+
+    def paths(self) -> List[TrainPath]:
+        return list(self._paths)
@@ -0,0 +1,79 @@
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from ..models.core.train import TrainPath, TrainService
+from ..models.core.timetable import PartitionedTimetable
+from .path_finder import SearchStats
+
+# Returns the existing paths that depart in [start, end)
+PartitionLoader = Callable[[datetime, datetime], Iterable[TrainPath]]
+
+
+@dataclass
+class PlannedRequest:
+    train: TrainService
+    requested_start: datetime
+    best_path: Optional[TrainPath]
+    alternatives: List[TrainPath] = field(default_factory=list)
+    stats: Optional[SearchStats] = None
+
+
+class RollingHorizonPlanner:
+    """Plans a stream of freight requests over an arbitrarily long horizon.
+
+    Requests must arrive in order of requested start time. For each request the
+    planner loads the timetable partitions covering [start, start + lookahead]
+    from ``loader``, evicts partitions that end before the request, searches,
+    and adds the chosen path to the partitions so later requests respect it.
+    Only the partitions inside the lookahead are ever held, so memory does not
+    depend on the length of the horizon. ``lookahead`` must cover the path
+    finder's departure window plus a journey.
+    """
+
+    def __init__(self,
+                 path_finder,
+                 loader: PartitionLoader,
+                 origin: datetime,
+                 partition_length: timedelta = timedelta(hours=1),
+                 lookahead: timedelta = timedelta(hours=4),
+                 deadline: Optional[float] = None,
+                 max_attempts: Optional[int] = 200):
+        self.path_finder = path_finder
+        self.loader = loader
+        self.lookahead = lookahead
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.timetable = PartitionedTimetable(origin, partition_length)
+        self._next_unloaded = self.timetable.partition_of(origin)
+
+    def _load_until(self, end: datetime):
+        last = self.timetable.partition_of(end)
+        while self._next_unloaded <= last:
+            start, stop = self.timetable.partition_bounds(self._next_unloaded)
+            self.timetable.add_many(self.loader(start, stop))
+            self._next_unloaded += 1
+
+    def plan(self, requests: Iterable[Tuple[TrainService, datetime]]) -> Iterator[PlannedRequest]:
+        """Plan each (train, requested start) in turn, yielding results as they are made"""
+        previous_start = None
+        for train, start_time in requests:
+            if previous_start is not None and start_time < previous_start:
+                raise ValueError("Requests must be ordered by requested start time")
+            previous_start = start_time
+
+            # Skip partitions no journey reaching this request can have started in
+            window_end = start_time + self.lookahead
+            self._next_unloaded = max(self._next_unloaded,
+                                      self.timetable.partition_of(start_time - self.lookahead))
+            self._load_until(window_end)
+            self.timetable.evict_before(start_time)
+            existing_paths = self.timetable.paths_between(start_time, window_end)
+
+            best_path, alternatives = self.path_finder.find_best_path(
+                train, start_time, existing_paths,
+                deadline=self.deadline, max_attempts=self.max_attempts
+            )
+            if best_path is not None:
+                self.timetable.add(best_path)
+            yield PlannedRequest(train, start_time, best_path, alternatives,
+                                 self.path_finder.last_search_stats)
@@ -0,0 +1,145 @@
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+import numpy as np
+from ..models.core.train import TrainPath, Direction
+from ..models.core.infrastructure import Infrastructure, DIRECTION_CODES
+from ..models.core.timetable import TimetableSnapshot
+
+
+def _minutes(time: datetime, reference: datetime) -> float:
+    return (time - reference).total_seconds() / 60
+
+
+class OccupancyTable:
+    """Columnar view of the section occupancies of existing paths.
+
+    Times are float minutes from ``reference``. One row per schedule entry with
+    its section, base section, direction, entry time, end of dwell and the
+    entry time of the next section (NaN for a path's last entry). A
+    ``TimetableSnapshot`` is read from its section index instead of its paths;
+    with ``start`` and ``end`` only the occupancies overlapping that span are kept.
+    """
+
+    def __init__(self,
+                 existing_paths: Iterable[TrainPath],
+                 infrastructure: Infrastructure,
+                 reference: datetime,
+                 start: Optional[datetime] = None,
+                 end: Optional[datetime] = None):
+        self.reference = reference
+        section, direction, entry, dwell_end, next_entry = [], [], [], [], []
+        for section_id, path, time, occupied_until, next_time in self._rows(existing_paths, start, end):
+            section.append(infrastructure.section_index[section_id])
+            direction.append(DIRECTION_CODES[path.train.direction])
+            entry.append(_minutes(time, reference))
+            dwell_end.append(_minutes(occupied_until, reference))
+            next_entry.append(_minutes(next_time, reference) if next_time is not None else np.nan)
+        self.section = np.array(section, dtype=np.int32)
+        self.base = infrastructure.base_sections[self.section]
+        self.direction = np.array(direction, dtype=np.int8)
+        self.start = np.array(entry, dtype=np.float64)
+        self.dwell_end = np.array(dwell_end, dtype=np.float64)
+        self.next_entry = np.array(next_entry, dtype=np.float64)
+        self.has_next = ~np.isnan(self.next_entry)
+
+    @staticmethod
+    def _rows(existing_paths: Iterable[TrainPath],
+              start: Optional[datetime],
+              end: Optional[datetime]) -> Iterator[Tuple[str, TrainPath, datetime, datetime, Optional[datetime]]]:
+        """(section id, path, entry, end of dwell, next entry or None) per occupancy.
+
+        Snapshots are read from their per-section index, restricted to
+        occupancies overlapping [start, end] when both are given.
+        """
+        if isinstance(existing_paths, TimetableSnapshot):
+            for section_id in existing_paths.section_ids:
+                if start is not None and end is not None:
+                    occupancies = existing_paths.occupancy_between(section_id, start, end)
+                else:
+                    occupancies = existing_paths.section_occupancy(section_id)
+                for occ in occupancies:
+                    yield section_id, occ.path, occ.start, occ.dwell_end, occ.end if occ.has_next else None
+            return
+        for path in existing_paths:
+            schedule = path.schedule
+            for i, (section_id, time, dwell) in enumerate(schedule):
+                yield (section_id, path, time, time + timedelta(minutes=dwell),
+                       schedule[i + 1][1] if i + 1 < len(schedule) else None)
+
+    def blocked_departures(self,
+                           route: Sequence[int],
+                           route_bases: Sequence[int],
+                           entry_offsets: Sequence[float],
+                           dwells: Sequence[float],
+                           direction: Direction,
+                           headway_minutes: float) -> np.ndarray:
+        """Departure times (minutes from reference) that clash with an existing path.
+
+        Each occupancy is shifted back by the candidate's cumulative running time
+        to the section it shares, giving one blocked departure interval per pair:
+
+        * same direction, same section: the dwell windows must be at least
+          ``headway_minutes`` apart (the ConflictChecker rule, applied per section);
+        * opposite direction, same base section: the section occupancies
+          (entry to next entry) must not overlap (the crossing rule).
+        """
+        code = DIRECTION_CODES[direction]
+        same_direction = self.direction == code
+        crossing_rows = ~same_direction & self.has_next
+        lows, highs = [], []
+        for i, section in enumerate(route):
+            offset, dwell = entry_offsets[i], dwells[i]
+            rows = same_direction & (self.section == section)
+            lows.append(self.start[rows] - headway_minutes - offset - dwell)
+            highs.append(self.dwell_end[rows] + headway_minutes - offset)
+            if i + 1 < len(route):
+                rows = crossing_rows & (self.base == route_bases[i])
+                lows.append(self.start[rows] - entry_offsets[i + 1])
+                highs.append(self.next_entry[rows] - offset)
+        return np.column_stack([np.concatenate(lows), np.concatenate(highs)])
+
+
+def free_intervals(blocked: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """Complement of the union of ``blocked`` intervals inside [lower, upper]"""
+    blocked = blocked[(blocked[:, 1] > lower) & (blocked[:, 0] < upper)]
+    if not len(blocked):
+        return np.array([[lower, upper]])
+    blocked = blocked[np.argsort(blocked[:, 0], kind="stable")]
+    covered_until = np.maximum.accumulate(blocked[:, 1])
+    free = np.column_stack([
+        np.concatenate([[lower], covered_until]),
+        np.concatenate([blocked[:, 0], [upper]])
+    ])
+    free[:, 0] = np.maximum(free[:, 0], lower)
+    free[:, 1] = np.minimum(free[:, 1], upper)
+    return free[free[:, 1] > free[:, 0]]
+
+
+def sample_in_intervals(intervals: np.ndarray, u: float) -> float:
+    """Map u in [0, 1) uniformly onto the union of disjoint intervals"""
+    lengths = intervals[:, 1] - intervals[:, 0]
+    cumulative = np.cumsum(lengths)
+    target = u * cumulative[-1]
+    k = min(int(np.searchsorted(cumulative, target, side="right")), len(intervals) - 1)
+    return float(intervals[k, 1] - (cumulative[k] - target))
+
+
+def sample_grid_in_intervals(intervals: np.ndarray, step: float, u: float) -> Optional[int]:
+    """Map u in [0, 1) uniformly onto the grid points ``k * step`` strictly inside the intervals.
+
+    Returns the grid index k, or None if no grid point lies inside.
+    """
+    first = np.floor(intervals[:, 0] / step).astype(np.int64) + 1
+    last = np.ceil(intervals[:, 1] / step).astype(np.int64) - 1
+    counts = np.maximum(last - first + 1, 0)
+    cumulative = np.cumsum(counts)
+    if not len(cumulative) or cumulative[-1] == 0:
+        return None
+    target = min(int(u * cumulative[-1]), int(cumulative[-1]) - 1)
+    k = int(np.searchsorted(cumulative, target, side="right"))
+    return int(first[k] + target - (cumulative[k] - counts[k]))
+
+
+def to_datetimes(intervals: np.ndarray, reference: datetime) -> List[Tuple[datetime, datetime]]:
+    return [(reference + timedelta(minutes=float(lo)), reference + timedelta(minutes=float(hi)))
+            for lo, hi in intervals]
@@ -1,17 +1,30 @@
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 import random
 from ...models.core.train import TrainPath, TrainService, Direction
 
 class TimetableGenerator:
-    def generate_dummy_timetable(self, num_trains: int = 10) -> List[TrainPath]:
-        """Generate dummy timetable data with alternating directions"""
+    def generate_dummy_timetable(self,
+                                 num_trains: int = 10,
+                                 base_time: Optional[datetime] = None,
+                                 interval_minutes: float = 20,
+                                 up_share: Optional[float] = None) -> List[TrainPath]:
+        """Generate dummy timetable data with alternating directions.
+
+        Trains depart every ``interval_minutes`` from ``base_time`` (06:00 today
+        by default). With ``up_share`` each train runs UP with that probability
+        instead of the directions alternating.
+        """
         paths = []
-        base_time = datetime.now().replace(hour=6, minute=0, second=0, microsecond=0)
+        if base_time is None:
+            base_time = datetime.now().replace(hour=6, minute=0, second=0, microsecond=0)
         
         for i in range(num_trains):
             # Alternate between UP and DOWN direction
-            direction = Direction.UP if i % 2 == 0 else Direction.DOWN
+            if up_share is None:
+                direction = Direction.UP if i % 2 == 0 else Direction.DOWN
+            else:
+                direction = Direction.UP if random.random() < up_share else Direction.DOWN
             
             # Create alternating passenger and freight trains
             train = (TrainService.create_dummy_passenger_train(direction) 
@@ -22,10 +35,10 @@ class TimetableGenerator:
             direction_suffix = "_UP" if direction == Direction.UP else "_DOWN"
             sections = [f"SEC{j}{direction_suffix}" for j in range(1, 4)]
             
-            # Create schedule with 20-minute intervals
+            # Create schedule with regular departure intervals
             schedule = []
             platforms = []
-            current_time = base_time + timedelta(minutes=20*i)
+            current_time = base_time + timedelta(minutes=interval_minutes*i)
             
             for section in sections:
                 # Add random dwell time at stations
@@ -43,4 +56,9 @@ class TimetableGenerator:
             
             paths.append(TrainPath(train, schedule, speeds, platforms))
         
-        return paths
\ No newline at end of file
+        return paths
+
+    def generate_dummy_window(self, start: datetime, end: datetime) -> List[TrainPath]:
+        """Dummy timetable of trains departing in [start, end), e.g. as a partition loader"""
+        num_trains = -(-(end - start) // timedelta(minutes=20))
+        return self.generate_dummy_timetable(num_trains, base_time=start)
@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+import glob
+import os
+import random
+import numpy as np
+from ...models.core.infrastructure import Infrastructure
+from ...models.core.train import TrainService, Direction
+from ...models.ml.path_success_predictor import PathSuccessPredictor
+from ...algorithms.path_finder import PathFinder
+from ...algorithms.conflict_checker import ConflictChecker
+from .data_preprocessor import TimetableGenerator
+
+
+@dataclass
+class ScenarioConfig:
+    """Shape of the synthetic scenarios used to label candidate paths.
+
+    Each scenario draws its first departure from anywhere on ``base_date``,
+    the interval between timetabled departures and the share of UP trains
+    from the given ranges. The date is fixed so shards do not depend on the
+    day they are generated.
+    """
+    min_trains: int = 6
+    max_trains: int = 14
+    scenarios_per_shard: int = 20
+    candidates_per_scenario: int = 500
+    min_headway_minutes: float = 5
+    base_date: datetime = datetime(2024, 1, 1)
+    min_interval_minutes: float = 8
+    max_interval_minutes: float = 30
+    min_up_share: float = 0.2
+    max_up_share: float = 0.8
+
+
+def _label_shard(args: Tuple[int, int, ScenarioConfig, str, str]) -> Tuple[str, int, int]:
+    """Worker: generate, label and write one shard; return (path, samples, positives)"""
+    shard_index, seed, config, output_dir, file_format = args
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+
+    infrastructure = Infrastructure.create_dummy_infrastructure()
+    finder = PathFinder(infrastructure, None, None, verbose=False)
+    finder.conflict_checker = ConflictChecker(config.min_headway_minutes, verbose=False)
+    predictor = PathSuccessPredictor()
+    generator = TimetableGenerator()
+
+    features, labels = [], []
+    for _ in range(config.scenarios_per_shard):
+        existing_paths = generator.generate_dummy_timetable(
+            num_trains=random.randint(config.min_trains, config.max_trains),
+            base_time=config.base_date + timedelta(minutes=random.randrange(24 * 60)),
+            interval_minutes=random.uniform(config.min_interval_minutes, config.max_interval_minutes),
+            up_share=random.uniform(config.min_up_share, config.max_up_share)
+        )
+        start_time = existing_paths[0].start_time
+        columns = finder._schedule_columns(existing_paths)
+        for _ in range(config.candidates_per_scenario):
+            direction = random.choice([Direction.UP, Direction.DOWN])
+            train = (TrainService.create_dummy_freight_train(direction) if random.random() < 0.8
+                     else TrainService.create_dummy_passenger_train(direction))
+            candidate = finder._sample_candidate(train, start_time)
+            # The crossing and conflict checks are the labeller
+            feasible = (not finder._is_path_crossing(candidate, columns) and
+                        not finder.conflict_checker.check_conflicts(candidate, columns))
+            features.append(predictor._extract_features(candidate)[0])
+            labels.append(feasible)
+
+    X = np.asarray(features, dtype=np.float32)
+    y = np.asarray(labels, dtype=np.int8)
+    path = os.path.join(output_dir, f"shard-{shard_index:05d}")
+    if file_format == "parquet":
+        import pandas as pd
+        frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])])
+        frame["label"] = y
+        path += ".parquet"
+        frame.to_parquet(path, index=False)
+    else:
+        np.save(path + ".X.npy", X)
+        np.save(path + ".y.npy", y)
+        path += ".X.npy"
+    return path, len(y), int(y.sum())
+
+
+def generate_training_shards(output_dir: str,
+                             num_shards: int,
+                             config: Optional[ScenarioConfig] = None,
+                             workers: Optional[int] = None,
+                             seed: int = 0,
+                             file_format: str = "npy") -> List[str]:
+    """Label synthetic candidate paths in parallel and write them as shards.
+
+    Each shard is produced end-to-end by one worker process, so the parent
+    only ever sees shard file names. ``file_format`` is ``"npy"`` (a ``.X.npy``
+    and ``.y.npy`` pair per shard) or ``"parquet"`` (needs pyarrow).
+    """
+    if file_format not in ("npy", "parquet"):
+        raise ValueError(f"Unknown shard format: {file_format}")
+    config = config or ScenarioConfig()
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = [(i, seed * 1_000_003 + i, config, output_dir, file_format) for i in range(num_shards)]
+    shard_paths = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, samples, positives in pool.map(_label_shard, tasks):
+            print(f"Wrote {path}: {samples} samples, {positives} feasible")
+            shard_paths.append(path)
+    return shard_paths
+
+
+def find_shards(directory: str) -> List[str]:
+    """Shard files in a directory, in shard order"""
+    return sorted(glob.glob(os.path.join(directory, "shard-*.X.npy")) +
+                  glob.glob(os.path.join(directory, "shard-*.parquet")))
+
+
+def iter_shards(shard_paths: Iterable[str]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield (features, labels) one shard at a time; .npy shards are memory-mapped"""
+    for path in shard_paths:
+        if path.endswith(".parquet"):
+            import pandas as pd
+            frame = pd.read_parquet(path)
+            yield frame.drop(columns="label").to_numpy(np.float32), frame["label"].to_numpy()
+        else:
+            yield (np.load(path, mmap_mode="r"),
+                   np.load(path[:-len(".X.npy")] + ".y.npy", mmap_mode="r"))
@@ -1,16 +1,20 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 from enum import Enum
+import hashlib
+import re
+import numpy as np
+from .train import Direction
 
 class TrackType(Enum):
     SINGLE = "single"
     DOUBLE = "double"
 
-class Direction(Enum):
-    UP = "up"
-    DOWN = "down"
+TRACK_TYPE_CODES = {track_type: code for code, track_type in enumerate(TrackType)}
+DIRECTION_CODES = {Direction.UP: 0, Direction.DOWN: 1}
+_DIRECTION_SUFFIXES = {"UP": Direction.UP, "DOWN": Direction.DOWN}
 
-@dataclass
+@dataclass(slots=True)
 class TrackSection:
     id: str
     length: float  # in kilometers
@@ -29,7 +33,108 @@ class TrackSection:
 
 @dataclass
 class Infrastructure:
+    """Track sections plus integer-indexed views of them for hot loops.
+
+    Section and station ids are interned to dense integers on construction.
+    Per-section attributes are exposed as parallel NumPy arrays indexed by
+    section number, and base sections (``"SEC2"`` for ``"SEC2_DOWN"``),
+    directions and routes (sections chained end to start) are precomputed.
+    Call ``reindex()`` after changing ``sections`` in place.
+    """
     sections: Dict[str, TrackSection]
+    section_ids: List[str] = field(init=False, repr=False, compare=False)
+    section_index: Dict[str, int] = field(init=False, repr=False, compare=False)
+    station_ids: List[str] = field(init=False, repr=False, compare=False)
+    station_index: Dict[str, int] = field(init=False, repr=False, compare=False)
+    base_ids: List[str] = field(init=False, repr=False, compare=False)
+    section_base: Dict[str, int] = field(init=False, repr=False, compare=False)
+    lengths: np.ndarray = field(init=False, repr=False, compare=False)
+    max_speeds: np.ndarray = field(init=False, repr=False, compare=False)
+    track_types: np.ndarray = field(init=False, repr=False, compare=False)
+    has_platforms: np.ndarray = field(init=False, repr=False, compare=False)
+    has_passing_loop: np.ndarray = field(init=False, repr=False, compare=False)
+    start_stations: np.ndarray = field(init=False, repr=False, compare=False)
+    end_stations: np.ndarray = field(init=False, repr=False, compare=False)
+    base_sections: np.ndarray = field(init=False, repr=False, compare=False)
+    directions: np.ndarray = field(init=False, repr=False, compare=False)
+    routes: Dict[Direction, np.ndarray] = field(init=False, repr=False, compare=False)
+    version: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.reindex()
+
+    def reindex(self):
+        """Rebuild the interned ids and array views from ``sections``"""
+        self.section_ids = list(self.sections)
+        self.section_index = {section_id: i for i, section_id in enumerate(self.section_ids)}
+        sections = [self.sections[section_id] for section_id in self.section_ids]
+
+        self.station_ids = list(dict.fromkeys(
+            station for section in sections for station in (section.start_point, section.end_point)
+        ))
+        self.station_index = {station: i for i, station in enumerate(self.station_ids)}
+
+        self.lengths = np.array([section.length for section in sections], dtype=np.float64)
+        self.max_speeds = np.array([section.max_speed for section in sections], dtype=np.float64)
+        self.track_types = np.array([TRACK_TYPE_CODES[section.track_type] for section in sections],
+                                    dtype=np.int8)
+        self.has_platforms = np.array([section.has_platforms for section in sections], dtype=bool)
+        self.has_passing_loop = np.array([section.has_passing_loop for section in sections], dtype=bool)
+        self.start_stations = np.array([self.station_index[section.start_point] for section in sections],
+                                       dtype=np.int32)
+        self.end_stations = np.array([self.station_index[section.end_point] for section in sections],
+                                     dtype=np.int32)
+
+        # "SEC2_DOWN" -> base "SEC2", direction DOWN
+        base_names, directions = [], []
+        for section_id in self.section_ids:
+            base, _, suffix = section_id.rpartition("_")
+            direction = _DIRECTION_SUFFIXES.get(suffix)
+            base_names.append(base if direction is not None else section_id)
+            directions.append(DIRECTION_CODES[direction] if direction is not None else -1)
+        self.base_ids = list(dict.fromkeys(base_names))
+        base_index = {base: i for i, base in enumerate(self.base_ids)}
+        self.base_sections = np.array([base_index[base] for base in base_names], dtype=np.int32)
+        self.section_base = {section_id: base_index[base]
+                             for section_id, base in zip(self.section_ids, base_names)}
+        self.directions = np.array(directions, dtype=np.int8)
+
+        self.routes = {
+            direction: self._chain(np.flatnonzero(self.directions == code), direction)
+            for direction, code in DIRECTION_CODES.items()
+        }
+
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(sorted(self.sections.items())).encode())
+        self.version = h.hexdigest()
+
+    def _chain(self, members: np.ndarray, direction: Direction) -> np.ndarray:
+        """Order sections so each one starts at the station where the previous one ends.
+
+        When the sections do not form a single unbranched line, UP trains run
+        through them in natural order of their ids ("SEC2" before "SEC10") and
+        DOWN trains in reverse.
+        """
+        by_start = {int(self.start_stations[i]): int(i) for i in members}
+        ends = {int(self.end_stations[i]) for i in members}
+        heads = [i for i in members if int(self.start_stations[i]) not in ends]
+        order = []
+        if len(by_start) == len(members) and len(heads) == 1:
+            section = int(heads[0])
+            while section is not None and len(order) < len(members):
+                order.append(section)
+                section = by_start.get(int(self.end_stations[section]))
+        if len(order) != len(members):
+            order = sorted((int(i) for i in members), key=lambda i: [
+                (0, int(part), "") if part.isdigit() else (1, 0, part)
+                for part in re.split(r"(\d+)", self.section_ids[i])
+            ], reverse=(direction == Direction.DOWN))
+        return np.array(order, dtype=np.int32)
+
+    def route(self, direction: Direction) -> np.ndarray:
+        """Section indices a train running in ``direction`` passes, in order"""
+        return self.routes[direction]
+
     
     @classmethod
     def create_dummy_infrastructure(cls) -> 'Infrastructure':
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class ScheduleEntry:
     section_id: str
     time: datetime
@@ -0,0 +1,285 @@
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+from datetime import datetime, timedelta
+from types import MappingProxyType
+import bisect
+import hashlib
+from .train import TrainPath
+
+
+class Occupancy(NamedTuple):
+    """One train's use of a section: entry time, end of dwell and exit time.
+
+    ``has_next`` is False for the last entry of a path, whose exit is its end of
+    dwell. ``slot`` identifies the path's place in its snapshot.
+    """
+    start: datetime
+    dwell_end: datetime
+    end: datetime
+    path: TrainPath
+    has_next: bool = True
+    slot: int = -1
+
+
+def _path_occupancies(path: TrainPath, slot: int) -> Iterator[Tuple[str, Occupancy]]:
+    schedule = path.schedule
+    for i, (section_id, time, dwell) in enumerate(schedule):
+        dwell_end = time + timedelta(minutes=dwell)
+        has_next = i + 1 < len(schedule)
+        end = schedule[i + 1][1] if has_next else dwell_end
+        yield section_id, Occupancy(time, dwell_end, end, path, has_next, slot)
+
+
+def _start_key(occupancy: Occupancy) -> datetime:
+    return occupancy.start
+
+
+def _duration(occupancy: Occupancy) -> timedelta:
+    return max(occupancy.end, occupancy.dwell_end) - occupancy.start
+
+
+def _chain_version(parent_version: str, operation: str, path: TrainPath) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(parent_version.encode())
+    h.update(operation.encode())
+    h.update(repr((path.train.id, path.schedule, path.speeds, path.platforms)).encode())
+    return h.hexdigest()
+
+
+_CHUNK = 64  # paths per chunk of a snapshot's path table
+
+
+class TimetableSnapshot:
+    """Immutable, versioned view of a timetable.
+
+    Paths are held in fixed-size chunks, and a per-section index keeps the
+    occupancies sorted by entry time together with the longest occupancy of
+    each section. Changes return a new snapshot that shares every untouched
+    chunk and section index with its parent: adding or removing a path copies
+    one chunk, the chunk table and the sections the path uses. A removed path
+    leaves an empty slot that is found through the section index rather than
+    by scanning, and the table is compacted once half of it is empty.
+    Snapshots are never mutated, which lets any number of threads or what-if
+    scenarios read them without locking.
+
+    A snapshot iterates like the list of paths it holds, so it can be passed
+    anywhere ``existing_paths`` is expected.
+    """
+
+    __slots__ = ("_chunks", "_count", "_sections", "_longest", "_path_tuple", "version")
+
+    def __init__(self,
+                 chunks: Tuple[Tuple[Optional[TrainPath], ...], ...],
+                 count: int,
+                 sections: Mapping[str, Tuple[Occupancy, ...]],
+                 longest: Mapping[str, timedelta],
+                 version: str):
+        self._chunks = chunks
+        self._count = count
+        self._sections = MappingProxyType(dict(sections))
+        self._longest = MappingProxyType(dict(longest))
+        self._path_tuple: Optional[Tuple[TrainPath, ...]] = None
+        self.version = version
+
+    @classmethod
+    def empty(cls) -> 'TimetableSnapshot':
+        return cls((), 0, {}, {}, hashlib.blake2b(b"", digest_size=16).hexdigest())
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[TrainPath]) -> 'TimetableSnapshot':
+        """Build a snapshot from a list of paths"""
+        paths = tuple(paths)
+        version = cls.empty().version
+        for path in paths:
+            version = _chain_version(version, "+", path)
+        return cls._build(paths, version)
+
+    @classmethod
+    def _build(cls, paths: Tuple[TrainPath, ...], version: str) -> 'TimetableSnapshot':
+        sections: Dict[str, List[Occupancy]] = {}
+        for slot, path in enumerate(paths):
+            for section_id, occupancy in _path_occupancies(path, slot):
+                sections.setdefault(section_id, []).append(occupancy)
+        return cls(
+            tuple(paths[i:i + _CHUNK] for i in range(0, len(paths), _CHUNK)),
+            len(paths),
+            {s: tuple(sorted(occ, key=_start_key)) for s, occ in sections.items()},
+            {s: max(map(_duration, occ)) for s, occ in sections.items()},
+            version
+        )
+
+    def __iter__(self) -> Iterator[TrainPath]:
+        for chunk in self._chunks:
+            for path in chunk:
+                if path is not None:
+                    yield path
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        return self.paths[index]
+
+    def __repr__(self) -> str:
+        return f"TimetableSnapshot({self._count} paths, version={self.version[:8]})"
+
+    @property
+    def paths(self) -> Tuple[TrainPath, ...]:
+        """All paths in insertion order; built once per snapshot on first use"""
+        if self._path_tuple is None:
+            self._path_tuple = tuple(self)
+        return self._path_tuple
+
+    @property
+    def section_ids(self) -> Tuple[str, ...]:
+        return tuple(self._sections)
+
+    def fork(self) -> 'TimetableSnapshot':
+        """Start a what-if scenario; O(1) because snapshots are immutable"""
+        return self
+
+    def section_occupancy(self, section_id: str) -> Tuple[Occupancy, ...]:
+        """All occupancies of a section, sorted by entry time"""
+        return self._sections.get(section_id, ())
+
+    def occupancy_between(self,
+                          section_id: str,
+                          start: datetime,
+                          end: datetime) -> Tuple[Occupancy, ...]:
+        """Occupancies of a section that enter before ``end`` and leave after ``start``"""
+        occupancies = self._sections.get(section_id, ())
+        if not occupancies:
+            return ()
+        # Nothing entering earlier than the longest occupancy before ``start`` can still be there
+        first = bisect.bisect_left(occupancies, start - self._longest[section_id], key=_start_key)
+        stop = bisect.bisect_left(occupancies, end, key=_start_key)
+        return tuple(occ for occ in occupancies[first:stop] if max(occ.end, occ.dwell_end) > start)
+
+    def _slot_of(self, path: TrainPath) -> int:
+        """Slot of ``path`` (matched by identity), found through its first section's index"""
+        section_id, entry_time, _ = path.schedule[0]
+        occupancies = self._sections.get(section_id, ())
+        i = bisect.bisect_left(occupancies, entry_time, key=_start_key)
+        while i < len(occupancies) and occupancies[i].start == entry_time:
+            if occupancies[i].path is path:
+                return occupancies[i].slot
+            i += 1
+        raise KeyError(f"Path for train {path.train.id} is not in this timetable")
+
+    def with_path(self, path: TrainPath) -> 'TimetableSnapshot':
+        """New snapshot with ``path`` added"""
+        chunks = self._chunks
+        if chunks and len(chunks[-1]) < _CHUNK:
+            slot = (len(chunks) - 1) * _CHUNK + len(chunks[-1])
+            chunks = chunks[:-1] + (chunks[-1] + (path,),)
+        else:
+            slot = len(chunks) * _CHUNK
+            chunks = chunks + ((path,),)
+        sections = dict(self._sections)
+        longest = dict(self._longest)
+        for section_id, occupancy in _path_occupancies(path, slot):
+            index = sections.get(section_id, ())
+            i = bisect.bisect_right(index, occupancy.start, key=_start_key)
+            sections[section_id] = index[:i] + (occupancy,) + index[i:]
+            longest[section_id] = max(longest.get(section_id, timedelta(0)), _duration(occupancy))
+        return TimetableSnapshot(chunks, self._count + 1, sections, longest,
+                                 _chain_version(self.version, "+", path))
+
+    def without_path(self, path: TrainPath) -> 'TimetableSnapshot':
+        """New snapshot with ``path`` (matched by identity) removed"""
+        slot = self._slot_of(path)
+        version = _chain_version(self.version, "-", path)
+        chunk_index, offset = divmod(slot, _CHUNK)
+        chunk = self._chunks[chunk_index]
+        chunks = (self._chunks[:chunk_index] + (chunk[:offset] + (None,) + chunk[offset + 1:],)
+                  + self._chunks[chunk_index + 1:])
+        count = self._count - 1
+        if sum(map(len, chunks)) - count > max(count, _CHUNK):
+            return TimetableSnapshot._build(
+                tuple(p for c in chunks for p in c if p is not None), version)
+
+        sections = dict(self._sections)
+        longest = dict(self._longest)
+        for section_id, entry_time, _ in path.schedule:
+            occupancies = sections[section_id]
+            i = bisect.bisect_left(occupancies, entry_time, key=_start_key)
+            while occupancies[i].slot != slot:
+                i += 1
+            index = occupancies[:i] + occupancies[i + 1:]
+            if not index:
+                del sections[section_id]
+                del longest[section_id]
+                continue
+            sections[section_id] = index
+            if _duration(occupancies[i]) >= longest[section_id]:
+                longest[section_id] = max(map(_duration, index))
+        return TimetableSnapshot(chunks, count, sections, longest, version)
+
+    def replace_path(self, old_path: TrainPath, new_path: TrainPath) -> 'TimetableSnapshot':
+        """New snapshot with ``old_path`` swapped for ``new_path``"""
+        return self.without_path(old_path).with_path(new_path)
+
+
+class PartitionedTimetable:
+    """Timetable split into fixed-length time partitions, each a TimetableSnapshot.
+
+    A path is registered in every partition its run overlaps, so a query over
+    a time range only has to look at the partitions covering that range, and
+    paths that cross a partition boundary are never missed. Partitions can be
+    evicted once planning has moved past them.
+    """
+
+    def __init__(self, origin: datetime, partition_length: timedelta = timedelta(hours=1)):
+        self.origin = origin
+        self.partition_length = partition_length
+        self._partitions: Dict[int, TimetableSnapshot] = {}
+
+    def __len__(self) -> int:
+        return len(self._partitions)
+
+    @property
+    def partition_keys(self) -> List[int]:
+        return sorted(self._partitions)
+
+    def partition_of(self, time: datetime) -> int:
+        return (time - self.origin) // self.partition_length
+
+    def partition_bounds(self, key: int) -> Tuple[datetime, datetime]:
+        start = self.origin + key * self.partition_length
+        return start, start + self.partition_length
+
+    def partition(self, key: int) -> TimetableSnapshot:
+        return self._partitions.get(key) or TimetableSnapshot.empty()
+
+    def _keys_for(self, path: TrainPath) -> range:
+        return range(self.partition_of(path.start_time), self.partition_of(path.end_time) + 1)
+
+    def add(self, path: TrainPath):
+        for key in self._keys_for(path):
+            self._partitions[key] = self.partition(key).with_path(path)
+
+    def add_many(self, paths: Iterable[TrainPath]):
+        grouped: Dict[int, List[TrainPath]] = {}
+        for path in paths:
+            for key in self._keys_for(path):
+                grouped.setdefault(key, []).append(path)
+        for key, new_paths in grouped.items():
+            self._partitions[key] = TimetableSnapshot.from_paths(self.partition(key).paths + tuple(new_paths))
+
+    def paths_between(self, start: datetime, end: datetime) -> List[TrainPath]:
+        """Distinct paths registered in the partitions covering [start, end]"""
+        seen = set()
+        paths = []
+        for key in range(self.partition_of(start), self.partition_of(end) + 1):
+            for path in self.partition(key):
+                if id(path) not in seen:
+                    seen.add(id(path))
+                    paths.append(path)
+        return paths
+
+    def evict_before(self, time: datetime) -> int:
+        """Drop partitions that end at or before ``time``; return how many were dropped"""
+        cutoff = self.partition_of(time)
+        stale = [key for key in self._partitions if key < cutoff]
+        for key in stale:
+            del self._partitions[key]
+        return len(stale)
@@ -7,7 +7,7 @@ class Direction(Enum):
     UP = "up"
     DOWN = "down"
 
-@dataclass
+@dataclass(slots=True)
 class TrainService:
     id: str
     train_type: str  # "passenger" or "freight"
@@ -50,7 +50,7 @@ class TrainService:
             max_dwell_time=10.0
         )
 
-@dataclass
+@dataclass(slots=True)
 class TrainPath:
     train: TrainService
     schedule: List[tuple[str, datetime, float]]  # section_id, time, dwell_time
@@ -1,6 +1,7 @@
+import hashlib
 import numpy as np
 from lightgbm import LGBMClassifier
-from typing import List
+from typing import Iterable, List, Tuple
 from ...models.core.train import TrainPath
 
 class PathSuccessPredictor:
@@ -12,6 +13,18 @@ class PathSuccessPredictor:
             num_leaves=20,
             min_child_samples=5
         )
+        self._version = None
+
+    @property
+    def version(self) -> str:
+        """Digest of the fitted model, so results ranked with it can be told apart after retraining"""
+        if self._version is None:
+            try:
+                model = self.model.booster_.model_to_string()
+            except Exception:
+                model = "untrained"
+            self._version = hashlib.blake2b(model.encode(), digest_size=16).hexdigest()
+        return self._version
     
     def _extract_features(self, path: TrainPath) -> np.ndarray:
         """Extract meaningful features from a train path"""
@@ -53,6 +66,25 @@ class PathSuccessPredictor:
         print(f"\nTraining with {X.shape[1]} features, {len(paths)} samples")
         print("Feature values sample:", X[0])
         self.model.fit(X, success_labels)
+        self._version = None
+    
+    def train_from_shards(self, shards: Iterable[Tuple[np.ndarray, np.ndarray]],
+                          rounds_per_shard: int = 10):
+        """Train incrementally from (features, labels) shards, e.g. ``iter_shards(...)``.
+
+        Each shard adds ``rounds_per_shard`` boosting rounds on top of the model
+        trained so far, so only one shard has to be in memory at a time.
+        """
+        booster = None
+        self.model.set_params(n_estimators=rounds_per_shard)
+        for i, (X, y) in enumerate(shards):
+            if len(np.unique(y)) < 2:
+                print(f"Skipping shard {i}: only one class present")
+                continue
+            self.model.fit(np.asarray(X), np.asarray(y).astype(bool), init_model=booster)
+            booster = self.model.booster_
+            print(f"Trained on shard {i} ({len(y)} samples), {booster.current_iteration()} trees")
+            self._version = None
     
     def predict_success_probability(self, path: TrainPath) -> float:
         """Predict the probability of a path being successful"""
@@ -1,5 +1,5 @@
 import plotly.graph_objects as go
-from typing import List
+from typing import Iterable, List
 from ..models.core.train import TrainPath, Direction
 from datetime import datetime, timedelta
 import numpy as np
@@ -12,13 +12,13 @@ class TimeSpaceDiagram:
     def _convert_to_numeric_time(self, time: datetime, base_time: datetime) -> float:
         return (time - base_time).total_seconds() / 60
 
-    def create_diagram(self, existing_paths: List[TrainPath], optimal_path: TrainPath = None, 
+    def create_diagram(self, existing_paths: Iterable[TrainPath], optimal_path: TrainPath = None, 
                       alternative_paths: List[TrainPath] = None) -> go.Figure:
         print("\nCreating Time-Space Diagram:")
         fig = go.Figure()
         
-        # Collect all paths
-        all_paths = existing_paths.copy()
+        # Collect all paths (existing_paths may be a list or a TimetableSnapshot)
+        all_paths = list(existing_paths)
         if alternative_paths:
             all_paths.extend(alternative_paths)
         if optimal_path:
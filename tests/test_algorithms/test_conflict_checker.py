@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+from src.models.core.train import TrainService, TrainPath, Direction
+from src.algorithms.conflict_checker import ConflictChecker, ScheduleColumns
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+
+
+def freight_path(number, departure, direction=Direction.UP, dwell=3.0):
+    train = TrainService.create_dummy_freight_train(direction)
+    train.id = f"F{number}"
+    suffix = "_UP" if direction == Direction.UP else "_DOWN"
+    schedule, entry = [], departure
+    for i in (1, 2, 3):
+        schedule.append((f"SEC{i}{suffix}", entry, dwell))
+        entry += timedelta(minutes=10 + dwell)
+    return TrainPath(train, schedule, [100, 100, 90], ["", "", ""])
+
+
+def test_headway_is_inclusive_and_exact():
+    checker = ConflictChecker(verbose=False)
+    existing = [freight_path(0, BASE_TIME)]
+    # Starts exactly one headway after the leader's dwell ends: still a conflict
+    touching = freight_path(1, BASE_TIME + timedelta(minutes=8))
+    clear = freight_path(2, BASE_TIME + timedelta(minutes=8, microseconds=1))
+
+    conflicts = checker.check_conflicts(touching, existing)
+    assert [c['section'] for c in conflicts] == ["SEC1_UP", "SEC2_UP", "SEC3_UP"]
+    assert conflicts[0]['headway_violation'] == 0.0
+    assert checker.check_conflicts(clear, existing) == []
+
+
+def test_columns_match_the_path_list():
+    checker = ConflictChecker(verbose=False)
+    existing = [freight_path(i, BASE_TIME + timedelta(minutes=7 * i), direction)
+                for i, direction in enumerate([Direction.UP, Direction.DOWN] * 5)]
+    columns = ScheduleColumns(existing)
+    for minutes in range(0, 80, 3):
+        path = freight_path(99, BASE_TIME + timedelta(minutes=minutes))
+        conflicts = checker.check_conflicts(path, existing)
+        assert conflicts == checker.check_conflicts(path, columns)
+        assert all(c['train2'] in {p.train.id for p in existing if p.train.direction == Direction.UP}
+                   for c in conflicts)
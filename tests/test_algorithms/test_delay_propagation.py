@@ -0,0 +1,159 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from src.models.core.infrastructure import Infrastructure
+from src.models.core.train import TrainService, TrainPath, Direction
+from src.models.core.timetable import TimetableSnapshot
+from src.data.processors.data_preprocessor import TimetableGenerator
+from src.algorithms.conflict_checker import ConflictChecker
+from src.algorithms.path_finder import PathFinder
+from src.algorithms.delay_propagation import DelayPropagator, FreightReplanner
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+
+
+def count_conflicts(paths):
+    checker = ConflictChecker(verbose=False)
+    return sum(len(checker.check_conflicts(path, [other for other in paths if other is not path]))
+               for path in paths)
+
+
+def passenger_path(number, departure, dwell=3.0):
+    train = TrainService.create_dummy_passenger_train(Direction.UP)
+    train.id = f"P{number}"
+    schedule, entry = [], departure
+    for section_id in ("SEC1_UP", "SEC2_UP", "SEC3_UP"):
+        schedule.append((section_id, entry, dwell))
+        entry += timedelta(minutes=10 + dwell)
+    return TrainPath(train, schedule, [120, 100, 90], ["", "", ""])
+
+
+@pytest.fixture
+def infrastructure():
+    return Infrastructure.create_dummy_infrastructure()
+
+
+@pytest.fixture
+def timetable():
+    random.seed(3)
+    return TimetableSnapshot.from_paths(TimetableGenerator().generate_dummy_timetable(12, base_time=BASE_TIME))
+
+
+def test_propagated_followers_keep_headway(infrastructure):
+    paths = [passenger_path(i, BASE_TIME + timedelta(minutes=9 * i)) for i in range(5)]
+    assert count_conflicts(paths) == 0
+
+    result = DelayPropagator(infrastructure).propagate(paths, paths[0], 20)
+
+    assert len(result.replaced) == 5
+    assert count_conflicts(list(result.timetable)) == 0
+
+
+def test_propagation_leaves_other_trains_in_place(infrastructure):
+    paths = [passenger_path(0, BASE_TIME), passenger_path(1, BASE_TIME + timedelta(hours=2))]
+    result = DelayPropagator(infrastructure).propagate(paths, paths[0], 10)
+
+    assert [old for old, _ in result.replaced] == [paths[0]]
+    assert any(path is paths[1] for path in result.timetable)
+
+
+@pytest.mark.parametrize("delay", [3, 8, 15, 25])
+def test_warm_starts_are_conflict_free(infrastructure, timetable, delay):
+    replanner = FreightReplanner(PathFinder(infrastructure, None, None, verbose=False))
+    for path in timetable:
+        if path.train.train_type != "passenger":
+            continue
+        delayed = DelayPropagator(infrastructure).propagate(timetable, path, delay).timetable
+        for old_path in replanner.affected_freight(delayed):
+            others = delayed.without_path(old_path)
+            warm = replanner._warm_start(old_path, others)
+            assert warm is not None
+            assert not replanner._conflicts(warm, others)
+
+
+def test_replanned_freight_is_conflict_free(infrastructure, timetable):
+    replanner = FreightReplanner(PathFinder(infrastructure, None, None, verbose=False), budget_per_train=0.05)
+    delayed = DelayPropagator(infrastructure).propagate(timetable, timetable[0], 15).timetable
+
+    result = replanner.replan(delayed)
+
+    assert result.replaced
+    assert replanner.affected_freight(result.timetable) == []
+    for _, new_path in result.replaced:
+        assert new_path is not None
+        assert not replanner._conflicts(new_path, result.timetable)
+
+
+def freight_path(number, departure, direction=Direction.UP, dwell=3.0):
+    train = TrainService.create_dummy_freight_train(direction)
+    train.id = f"F{number}"
+    suffix = "_UP" if direction == Direction.UP else "_DOWN"
+    sections = [f"SEC{i}{suffix}" for i in (1, 2, 3)]
+    if direction == Direction.DOWN:
+        sections.reverse()
+    schedule, entry = [], departure
+    for section_id in sections:
+        schedule.append((section_id, entry, dwell))
+        entry += timedelta(minutes=10 + dwell)
+    return TrainPath(train, schedule, [100, 100, 90], ["", "", ""])
+
+
+def down_passenger_path(number, departure, dwell=3.0):
+    path = freight_path(number, departure, Direction.DOWN, dwell)
+    train = TrainService.create_dummy_passenger_train(Direction.DOWN)
+    train.id = f"P{number}"
+    return TrainPath(train, path.schedule, [120, 100, 90], path.platforms)
+
+
+def test_knock_on_passes_over_freight_in_between(infrastructure):
+    paths = [passenger_path(0, BASE_TIME), freight_path(1, BASE_TIME + timedelta(minutes=9)),
+             passenger_path(2, BASE_TIME + timedelta(minutes=18))]
+    result = DelayPropagator(infrastructure).propagate(paths, paths[0], 25)
+
+    passengers = [path for path in result.timetable if path.train.train_type == "passenger"]
+    assert {old.train.id for old, _ in result.replaced} == {"P0", "P2"}
+    assert count_conflicts(passengers) == 0
+    assert any(path is paths[1] for path in result.timetable)
+
+
+def test_knock_on_across_directions(infrastructure):
+    finder = PathFinder(infrastructure, None, None, verbose=False)
+    up, down = passenger_path(0, BASE_TIME), down_passenger_path(1, BASE_TIME + timedelta(minutes=40))
+    assert not finder._is_path_crossing(up, [down])
+
+    result = DelayPropagator(infrastructure).propagate([up, down], up, 30)
+
+    new_up, new_down = sorted(result.timetable, key=lambda path: path.train.id)
+    assert new_down is not down
+    assert not finder._is_path_crossing(new_up, [new_down])
+
+
+def test_mixed_traffic_is_conflict_free_after_replanning(infrastructure):
+    random.seed(4)
+    paths = []
+    for i in range(8):
+        departure = BASE_TIME + timedelta(minutes=12 * i)
+        direction = Direction.UP if i % 3 else Direction.DOWN
+        if i % 2:
+            paths.append(freight_path(i, departure, direction))
+        elif direction == Direction.UP:
+            paths.append(passenger_path(i, departure))
+        else:
+            paths.append(down_passenger_path(i, departure))
+    finder = PathFinder(infrastructure, None, None, verbose=False)
+    replanner = FreightReplanner(finder, budget_per_train=0.05)
+    clean = replanner.replan(TimetableSnapshot.from_paths(paths)).timetable
+    delayed_path = next(path for path in clean if path.train.id == "P2")
+
+    delayed = DelayPropagator(infrastructure).propagate(clean, delayed_path, 20).timetable
+    result = replanner.replan(delayed).timetable
+
+    assert count_conflicts(list(result)) == 0
+    for path in result:
+        assert not finder._is_path_crossing(path, [other for other in result if other is not path])
+
+
+def test_at_entry_out_of_range(infrastructure):
+    paths = [passenger_path(0, BASE_TIME)]
+    with pytest.raises(ValueError):
+        DelayPropagator(infrastructure).propagate(paths, paths[0], 5, at_entry=5)
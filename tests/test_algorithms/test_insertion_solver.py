@@ -0,0 +1,58 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from src.models.core.infrastructure import Infrastructure
+from src.models.core.train import TrainService, Direction
+from src.models.core.timetable import TimetableSnapshot
+from src.data.processors.data_preprocessor import TimetableGenerator
+from src.algorithms.path_finder import PathFinder
+from src.algorithms.insertion_solver import InsertionSolver
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+
+
+@pytest.fixture
+def path_finder():
+    return PathFinder(Infrastructure.create_dummy_infrastructure(), None, None, verbose=False)
+
+
+@pytest.fixture
+def timetable():
+    random.seed(5)
+    return TimetableSnapshot.from_paths(TimetableGenerator().generate_dummy_timetable(14, base_time=BASE_TIME))
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+@pytest.mark.parametrize("offset", [0, 90])
+def test_solution_passes_both_checkers(path_finder, timetable, direction, offset):
+    random.seed(1)
+    train = TrainService.create_dummy_freight_train(direction)
+    result = InsertionSolver(path_finder, time_limit=10).solve(train, BASE_TIME + timedelta(minutes=offset), timetable)
+
+    assert result.status == "optimal"
+    assert result.gap is not None and 0.0 <= result.gap <= 1e-4
+    assert result.solve_time > 0
+    assert result.path is not None
+    assert result.journey_time == pytest.approx(result.path.calculate_journey_time())
+    assert not path_finder._is_path_crossing(result.path, timetable)
+    assert not path_finder.conflict_checker.check_conflicts(result.path, timetable)
+
+
+def test_solution_is_no_worse_than_warm_start(path_finder, timetable):
+    random.seed(2)
+    train = TrainService.create_dummy_freight_train(Direction.DOWN)
+    warm_start, _ = path_finder.find_best_path(train, BASE_TIME, timetable, max_attempts=100)
+    result = InsertionSolver(path_finder).solve(train, BASE_TIME, timetable, warm_start=warm_start)
+
+    assert result.warm_start is warm_start
+    assert result.journey_time <= warm_start.calculate_journey_time() + 1e-6
+
+
+def test_last_section_runs_at_full_speed(path_finder, timetable):
+    random.seed(3)
+    train = TrainService.create_dummy_freight_train(Direction.UP)
+    result = InsertionSolver(path_finder).solve(train, BASE_TIME + timedelta(minutes=30), timetable)
+
+    profile = path_finder._route_profile(train)
+    assert result.status == "optimal"
+    assert result.path.speeds[-1] == pytest.approx(profile.max_speeds[-1])
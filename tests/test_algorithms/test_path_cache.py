@@ -0,0 +1,96 @@
+import os
+import random
+from datetime import datetime
+import pytest
+from src.models.core.infrastructure import Infrastructure
+from src.models.core.train import TrainService, Direction
+from src.models.core.timetable import TimetableSnapshot
+from src.data.processors.data_preprocessor import TimetableGenerator
+from src.algorithms.path_finder import PathFinder
+from src.algorithms.path_cache import PathResultCache, timetable_version
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+V1, V2 = "0" * 32, "f" * 32
+
+
+@pytest.fixture
+def timetable():
+    random.seed(3)
+    return TimetableSnapshot.from_paths(TimetableGenerator().generate_dummy_timetable(10, base_time=BASE_TIME))
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PathResultCache(max_entries=2)
+    cache.put("a", V1, (None, []))
+    cache.put("b", V1, (None, []))
+    assert cache.get("a", V1) is not None
+    cache.put("c", V1, (None, []))
+
+    assert len(cache) == 2
+    assert cache.get("b", V1) is None
+    assert cache.get("a", V1) is not None and cache.get("c", V1) is not None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_entries_are_separated_by_version(tmp_path):
+    cache = PathResultCache(disk_dir=str(tmp_path))
+    cache.put("a", V1, (None, ["one"]))
+    cache.put("a", V2, (None, ["two"]))
+    assert cache.get("a", V1) == (None, ["one"])
+    assert cache.get("a", V2) == (None, ["two"])
+
+    cache.clear(V1)
+    assert cache.get("a", V1) is None
+    assert cache.get("a", V2) == (None, ["two"])
+    assert not os.path.exists(tmp_path / V1)
+
+
+def test_disk_tier_outlives_memory(tmp_path):
+    cache = PathResultCache(max_entries=1, disk_dir=str(tmp_path))
+    cache.put("a", V1, (None, ["one"]))
+    cache.put("b", V1, (None, ["two"]))
+    assert len(cache) == 1
+    assert cache.get("a", V1) == (None, ["one"])  # evicted from memory, read back from disk
+
+    other = PathResultCache(disk_dir=str(tmp_path))
+    assert other.get("b", V1) == (None, ["two"])
+
+
+def test_clear_leaves_foreign_files(tmp_path):
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "keep.txt").write_text("x")
+    (tmp_path / "readme.txt").write_text("x")
+    cache = PathResultCache(disk_dir=str(tmp_path))
+    cache.put("a", "custom-version", (None, []))
+    cache.put("a", V1, (None, []))
+    (tmp_path / V1 / "keep.txt").write_text("x")
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert sorted(os.listdir(tmp_path)) == sorted([V1, "notes", "readme.txt"])
+    assert os.listdir(tmp_path / V1) == ["keep.txt"]
+    assert os.listdir(tmp_path / "notes") == ["keep.txt"]
+
+
+class FixedPredictor:
+    def __init__(self, version):
+        self.version = version
+
+    def predict_success_probability(self, path):
+        return 0.5
+
+
+def test_retrained_predictor_misses_the_cache(timetable):
+    predictor = FixedPredictor("v1")
+    finder = PathFinder(Infrastructure.create_dummy_infrastructure(), predictor, None,
+                        verbose=False, cache=PathResultCache())
+    train = TrainService.create_dummy_freight_train(Direction.DOWN)
+    finder.find_best_path(train, BASE_TIME, timetable, pareto=True, max_attempts=30)
+    finder.find_best_path(train, BASE_TIME, timetable, pareto=True, max_attempts=30)
+    assert finder.last_search_stats.cache_hit
+
+    predictor.version = "v2"
+    finder.find_best_path(train, BASE_TIME, timetable, pareto=True, max_attempts=30)
+    assert not finder.last_search_stats.cache_hit
+    assert timetable_version(timetable, finder.infrastructure) in {key[0] for key in finder.cache._entries}
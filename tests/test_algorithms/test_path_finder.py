@@ -0,0 +1,72 @@
+import random
+from datetime import datetime
+import pytest
+from src.models.core.infrastructure import Infrastructure
+from src.models.core.train import TrainService, Direction
+from src.models.core.timetable import TimetableSnapshot
+from src.data.processors.data_preprocessor import TimetableGenerator
+from src.algorithms.path_finder import PathFinder
+from src.algorithms.path_cache import timetable_version
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+
+
+@pytest.fixture
+def timetable():
+    random.seed(3)
+    return TimetableSnapshot.from_paths(TimetableGenerator().generate_dummy_timetable(10, base_time=BASE_TIME))
+
+
+def make_finder(**kwargs):
+    return PathFinder(Infrastructure.create_dummy_infrastructure(), None, None, verbose=False, **kwargs)
+
+
+def test_duplicates_are_skipped_and_not_returned(timetable):
+    random.seed(1)
+    finder = make_finder(signature_resolution_seconds=120)
+    train = TrainService.create_dummy_freight_train(Direction.DOWN)
+    paths = finder.generate_all_feasible_paths(train, BASE_TIME, timetable, max_paths=50, max_attempts=500)
+
+    stats = finder.last_search_stats
+    assert stats.duplicates > 0
+    assert stats.feasible + stats.rejected_crossing + stats.rejected_conflict + stats.duplicates \
+        + stats.no_free_window == stats.attempts
+    signatures = [finder._signature(path) for path in paths]
+    assert len(signatures) == len(set(signatures))
+
+
+def test_candidates_are_snapped_to_the_grid(timetable):
+    random.seed(1)
+    finder = make_finder(signature_resolution_seconds=60)
+    train = TrainService.create_dummy_freight_train(Direction.DOWN)
+    for path in finder.generate_all_feasible_paths(train, BASE_TIME, timetable, max_attempts=200):
+        assert path.start_time.second == 0 and path.start_time.microsecond == 0
+        assert all(float(dwell).is_integer() for _, _, dwell in path.schedule)
+
+
+def test_memo_is_reused_across_searches_and_stays_bounded(timetable):
+    random.seed(2)
+    finder = make_finder(signature_resolution_seconds=120, feasibility_memo_size=200)
+    train = TrainService.create_dummy_freight_train(Direction.DOWN)
+    finder.find_best_path(train, BASE_TIME, timetable, max_attempts=None, deadline=0.2)
+    assert len(finder._feasibility_memo) <= 200
+
+    _, paths = finder.find_best_path(train, BASE_TIME, timetable, max_attempts=300)
+    assert finder.last_search_stats.memo_hits > 0
+    assert len(finder._feasibility_memo) <= 200
+    # Memoised results are only reused for identical schedules, so every returned path is valid
+    for path in paths:
+        assert not finder._is_path_crossing(path, timetable)
+        assert not finder.conflict_checker.check_conflicts(path, timetable)
+
+
+def test_memo_is_scoped_by_timetable_version(timetable):
+    finder = make_finder()
+    train = TrainService.create_dummy_freight_train(Direction.DOWN)
+    other = timetable.without_path(timetable[0])
+    for snapshot in (timetable, other, timetable):
+        finder.find_best_path(train, BASE_TIME, snapshot, max_attempts=50)
+
+    versions = {key[0] for key in finder._feasibility_memo}
+    assert versions == {timetable_version(timetable, finder.infrastructure),
+                        timetable_version(other, finder.infrastructure)}
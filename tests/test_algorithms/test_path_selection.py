@@ -0,0 +1,87 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from src.models.core.infrastructure import Infrastructure
+from src.models.core.train import TrainService, TrainPath, Direction
+from src.models.core.timetable import TimetableSnapshot
+from src.data.processors.data_preprocessor import TimetableGenerator
+from src.algorithms.path_finder import PathFinder
+from src.algorithms.path_selection import TopKPaths, ParetoFront, path_total_dwell
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+
+
+def make_path(name, journey_minutes, dwell=1.0):
+    train = TrainService.create_dummy_freight_train(Direction.UP)
+    train.id = name
+    schedule = [("SEC1_UP", BASE_TIME, dwell),
+                ("SEC2_UP", BASE_TIME + timedelta(minutes=journey_minutes - dwell), dwell)]
+    return TrainPath(train, schedule, [100, 100], ["", ""])
+
+
+def test_top_k_keeps_the_k_best_in_order():
+    top = TopKPaths(3)
+    paths = [make_path(f"T{i}", minutes) for i, minutes in enumerate([30, 10, 50, 20, 40])]
+    kept = [top.push(path) for path in paths]
+
+    assert kept == [True, True, True, True, False]
+    assert [score for score, _ in top.items()] == [10, 20, 30]
+    assert top.worst_score == 30
+    assert len(top) == 3
+
+
+def test_top_k_ties_keep_the_earlier_path():
+    top = TopKPaths(2)
+    first, second, third = make_path("A", 10), make_path("B", 10), make_path("C", 10)
+    for path in (first, second, third):
+        top.push(path)
+
+    assert top.paths() == [first, second]
+
+
+def test_top_k_rejects_invalid_k():
+    with pytest.raises(ValueError):
+        TopKPaths(0)
+
+
+def test_pareto_front_drops_dominated_points():
+    front = ParetoFront(lambda path: path)
+    assert front.push("a", (3, 3))
+    assert front.push("b", (1, 5))
+    assert front.push("c", (5, 1))
+    assert not front.push("d", (4, 4))       # dominated by a
+    assert front.push("e", (2, 2))           # dominates a
+    assert [path for _, path in front.items()] == ["b", "e", "c"]
+
+
+def test_pareto_front_rejects_duplicates():
+    front = ParetoFront(lambda path: path)
+    assert front.push("a", (1, 2))
+    assert not front.push("b", (1, 2))
+    assert front.paths() == ["a"]
+
+
+def test_pareto_front_capacity_evicts_worst_first_objective():
+    front = ParetoFront(lambda path: path, capacity=2)
+    assert front.push("a", (1, 9))
+    assert front.push("b", (5, 5))
+    assert not front.push("c", (9, 1))       # evicted straight away
+    assert front.push("d", (3, 7))           # evicts b
+    assert front.paths() == ["a", "d"]
+
+
+def test_pareto_search_without_success_predictor():
+    random.seed(3)
+    timetable = TimetableSnapshot.from_paths(TimetableGenerator().generate_dummy_timetable(10, base_time=BASE_TIME))
+    finder = PathFinder(Infrastructure.create_dummy_infrastructure(), None, None, verbose=False)
+    train = TrainService.create_dummy_freight_train(Direction.DOWN)
+
+    best, alternatives = finder.find_best_path(train, BASE_TIME, timetable, pareto=True, max_attempts=200)
+
+    assert best is not None
+    objectives = [finder._path_objectives(path) for path in [best] + alternatives]
+    assert all(len(values) == 2 for values in objectives)
+    for i, a in enumerate(objectives):
+        for b in objectives[i + 1:]:
+            assert not (all(x <= y for x, y in zip(a, b)) or all(y <= x for x, y in zip(a, b)))
+    assert path_total_dwell(best) == objectives[0][1]
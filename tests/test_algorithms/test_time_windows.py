@@ -0,0 +1,85 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from src.models.core.infrastructure import Infrastructure
+from src.models.core.train import TrainService, TrainPath, Direction
+from src.models.core.timetable import TimetableSnapshot
+from src.data.processors.data_preprocessor import TimetableGenerator
+from src.algorithms.path_finder import PathFinder
+from src.algorithms.time_windows import OccupancyTable, free_intervals, sample_in_intervals
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+
+
+@pytest.fixture
+def path_finder():
+    return PathFinder(Infrastructure.create_dummy_infrastructure(), None, None, verbose=False)
+
+
+@pytest.fixture
+def timetable():
+    random.seed(7)
+    return TimetableSnapshot.from_paths(TimetableGenerator().generate_dummy_timetable(20, base_time=BASE_TIME))
+
+
+def test_free_intervals_is_complement_of_blocked():
+    blocked = np.array([[5.0, 10.0], [8.0, 12.0], [20.0, 25.0], [-5.0, 1.0], [40.0, 50.0]])
+    free = free_intervals(blocked, 0.0, 30.0)
+    np.testing.assert_allclose(free, [[1.0, 5.0], [12.0, 20.0], [25.0, 30.0]])
+
+
+def test_free_intervals_without_blocks_is_whole_range():
+    np.testing.assert_allclose(free_intervals(np.empty((0, 2)), 0.0, 60.0), [[0.0, 60.0]])
+
+
+def test_sample_in_intervals_stays_inside():
+    intervals = np.array([[1.0, 2.0], [10.0, 14.0]])
+    for u in np.linspace(0, 1, 50, endpoint=False):
+        value = sample_in_intervals(intervals, u)
+        assert np.any((intervals[:, 0] <= value) & (value <= intervals[:, 1]))
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+def test_free_departures_pass_both_checkers(path_finder, timetable, direction):
+    random.seed(11)
+    train = TrainService.create_dummy_freight_train(direction)
+    profile = path_finder._route_profile(train)
+    occupancy = OccupancyTable(timetable, path_finder.infrastructure, BASE_TIME)
+    checked = 0
+    for _ in range(200):
+        speed_factor = random.uniform(0.6, 1.0)
+        dwell_times = [random.uniform(train.min_dwell_time, train.max_dwell_time * 1.5)
+                       for _ in profile.section_ids]
+        offsets, dwells = path_finder._route_offsets(profile, speed_factor, dwell_times)
+        free = path_finder._free_departures(occupancy, train, profile, offsets, dwells, 0.0, 6 * 60)
+        if not len(free):
+            continue
+        departure = BASE_TIME + timedelta(minutes=sample_in_intervals(free, random.random()))
+        path = TrainPath(
+            train,
+            [(section_id, departure + timedelta(minutes=offset), dwell)
+             for section_id, offset, dwell in zip(profile.section_ids, offsets, dwells)],
+            [speed * speed_factor for speed in profile.max_speeds],
+            [platforms[0] if platforms else "" for platforms in profile.platforms]
+        )
+        assert not path_finder._is_path_crossing(path, timetable)
+        assert not path_finder.conflict_checker.check_conflicts(path, timetable)
+        checked += 1
+    assert checked > 0
+
+
+def test_snapshot_index_matches_path_list(path_finder, timetable):
+    train = TrainService.create_dummy_freight_train(Direction.UP)
+    profile = path_finder._route_profile(train)
+    offsets, dwells = path_finder._route_offsets(profile, 0.8, [train.min_dwell_time] * len(profile.section_ids))
+    start = BASE_TIME + timedelta(hours=1)
+    full = OccupancyTable(list(timetable), path_finder.infrastructure, start)
+    bounded = path_finder._occupancy_table(timetable, start, start, start + timedelta(hours=2),
+                                           offsets[-1] + dwells[-1])
+
+    assert len(bounded.start) < len(full.start)
+    np.testing.assert_allclose(
+        path_finder._free_departures(bounded, train, profile, offsets, dwells, 0.0, 120.0),
+        path_finder._free_departures(full, train, profile, offsets, dwells, 0.0, 120.0)
+    )
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from src.data.processors.training_data import ScenarioConfig, _label_shard, find_shards, iter_shards
+
+CONFIG = ScenarioConfig(scenarios_per_shard=6, candidates_per_scenario=40)
+
+
+@pytest.mark.parametrize("file_format", ["npy", "parquet"])
+def test_shard_round_trips_through_iter_shards(tmp_path, file_format):
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    path, samples, positives = _label_shard((0, 7, CONFIG, str(tmp_path), file_format))
+
+    assert find_shards(str(tmp_path)) == [path]
+    [(X, y)] = list(iter_shards([path]))
+    assert X.shape == (samples, 12) and len(y) == samples == 6 * 40
+    assert int(np.sum(y)) == positives
+    assert 0 < positives < samples
+
+
+def test_shards_are_reproducible_and_varied(tmp_path):
+    shards = []
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        shards.append(_label_shard((0, 7, CONFIG, str(tmp_path / name), "npy"))[0])
+    (X1, y1), (X2, y2) = iter_shards(shards)
+
+    np.testing.assert_array_equal(X1, X2)
+    np.testing.assert_array_equal(y1, y2)
+    # Scenarios start at different times of day
+    assert len(np.unique(np.floor(X1[:, 0]))) > 2
@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from src.models.core.timetable import TimetableSnapshot, PartitionedTimetable
+from src.data.processors.data_preprocessor import TimetableGenerator
+
+BASE_TIME = datetime(2024, 5, 1, 6, 0)
+
+
+@pytest.fixture
+def paths():
+    random.seed(9)
+    return TimetableGenerator().generate_dummy_timetable(150, base_time=BASE_TIME)
+
+
+def test_add_and_remove_keep_order_and_index(paths):
+    snapshot = TimetableSnapshot.empty()
+    for path in paths:
+        snapshot = snapshot.with_path(path)
+    assert list(snapshot) == paths
+    assert snapshot.version == TimetableSnapshot.from_paths(paths).version
+
+    removed = snapshot.without_path(paths[70])
+    assert len(removed) == len(paths) - 1
+    assert list(removed) == paths[:70] + paths[71:]
+    assert all(occ.path is not paths[70]
+               for section_id in removed.section_ids for occ in removed.section_occupancy(section_id))
+    assert list(snapshot) == paths  # the parent is untouched
+
+
+def test_changes_share_untouched_chunks(paths):
+    snapshot = TimetableSnapshot.from_paths(paths)
+    added = snapshot.with_path(paths[0])
+    removed = snapshot.without_path(paths[5])
+
+    assert added._chunks[0] is snapshot._chunks[0]
+    assert removed._chunks[-1] is snapshot._chunks[-1]
+
+
+def test_path_added_twice_is_removed_once(paths):
+    snapshot = TimetableSnapshot.from_paths(paths[:3]).with_path(paths[1])
+    removed = snapshot.without_path(paths[1])
+
+    assert [path is paths[1] for path in removed].count(True) == 1
+    with pytest.raises(KeyError):
+        removed.without_path(paths[1]).without_path(paths[1])
+
+
+def test_removing_most_paths_compacts(paths):
+    snapshot = TimetableSnapshot.from_paths(paths)
+    for path in paths[:120]:
+        snapshot = snapshot.without_path(path)
+
+    assert list(snapshot) == paths[120:]
+    assert sum(map(len, snapshot._chunks)) < 2 * len(paths[120:]) + 64
+    assert snapshot.replace_path(paths[130], paths[0])[-1] is paths[0]
+
+
+def test_occupancy_between_matches_a_full_scan(paths):
+    snapshot = TimetableSnapshot.from_paths(paths)
+    for hours in (0.5, 7, 30):
+        start = BASE_TIME + timedelta(hours=hours)
+        end = start + timedelta(minutes=45)
+        for section_id in snapshot.section_ids:
+            expected = tuple(occ for occ in snapshot.section_occupancy(section_id)
+                             if occ.start < end and max(occ.end, occ.dwell_end) > start)
+            assert snapshot.occupancy_between(section_id, start, end) == expected
+
+
+def test_partitioned_timetable_finds_paths_crossing_boundaries(paths):
+    timetable = PartitionedTimetable(BASE_TIME, timedelta(hours=1))
+    timetable.add_many(paths[:12])
+
+    start, end = BASE_TIME + timedelta(hours=1), BASE_TIME + timedelta(hours=2)
+    found = timetable.paths_between(start, end)
+    overlapping = [path for path in paths[:12] if path.start_time < end and path.end_time >= start]
+    assert overlapping
+    assert set(map(id, found)) >= set(map(id, overlapping))
+    assert len(found) == len(set(map(id, found)))
+    assert timetable.evict_before(BASE_TIME + timedelta(hours=2)) == 2